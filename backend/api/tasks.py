@@ -11,7 +11,7 @@ from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from enum import Enum
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Mapping, Protocol
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Protocol
 from uuid import uuid4
 
 logger = logging.getLogger(__name__)
@@ -29,13 +29,18 @@ class TaskState(str, Enum):
     FAILED = "failed"
 
 
-@dataclass(slots=True)
+@dataclass(frozen=True, slots=True)
 class ImagePayload:
     """Immutable representation of an uploaded image payload."""
 
     data: bytes
     filename: str
     content_type: str | None = None
+    size: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Frozen, so ``size`` cannot drift from ``data`` after construction.
+        object.__setattr__(self, "size", len(self.data))
 
     def normalised_content_type(self) -> str:
         """Validate the payload data and return the JPEG content type."""
@@ -82,12 +87,15 @@ class TaskInfo:
         self.status = TaskState.COMPLETED
         self.result = result
         self.updated_at = datetime.now(UTC)
-        self._completion_event.set()
 
     def mark_failed(self, message: str) -> None:
         self.status = TaskState.FAILED
         self.error = message
         self.updated_at = datetime.now(UTC)
+
+    def signal_completion(self) -> None:
+        """Wake any coroutine waiting for this task to finish."""
+
         self._completion_event.set()
 
 
@@ -101,6 +109,8 @@ class ImageProcessingService(Protocol):
 JPEG_CONTENT_TYPE = "image/jpeg"
 JPEG_CONTENT_TYPE_ALIASES = {"image/jpeg", "image/jpg"}
 JPEG_EXTENSIONS = {".jpg", ".jpeg"}
+JPEG_START_OF_IMAGE = b"\xff\xd8"
+JPEG_END_OF_IMAGE = b"\xff\xd9"
 
 CLASSIFICATION_PATTERN = re.compile(r"\b(DANGEROUS|MOVABLE|IMMOVABLE)\b", re.IGNORECASE)
 CLASSIFICATION_REWARD_VALUES = {
@@ -109,17 +119,14 @@ CLASSIFICATION_REWARD_VALUES = {
     "IMMOVABLE": -3,
 }
 CLASSIFICATION_ATTRIBUTE_SOURCE = "OpenAI vision classifier"
+CLASSIFICATION_PREFERRED_KEYS = ("response", "output", "choices", "content")
 
 
-def _looks_like_jpeg(data: bytes) -> bool:
-    """Return ``True`` when ``data`` appears to be a JPEG image."""
+def _is_well_formed_jpeg(data: bytes) -> bool:
+    """Return ``True`` when ``data`` carries the JPEG start and end markers."""
 
-    if len(data) < 4:
-        return False
-
-    starts_with_header = data[:2] == b"\xff\xd8"
-    ends_with_footer = data[-2:] == b"\xff\xd9"
-    return starts_with_header and ends_with_footer
+    view = memoryview(data)
+    return len(view) >= 4 and view[:2] == JPEG_START_OF_IMAGE and view[-2:] == JPEG_END_OF_IMAGE
 
 
 def normalise_image_content_type(
@@ -136,7 +143,7 @@ def normalise_image_content_type(
     if suffix and suffix not in JPEG_EXTENSIONS:
         raise ValueError("Only .jpg images are supported")
 
-    if not _looks_like_jpeg(data):
+    if not _is_well_formed_jpeg(data):
         raise ValueError("Uploaded data is not a valid JPEG image")
 
     return JPEG_CONTENT_TYPE
@@ -190,43 +197,36 @@ class OpenAIImageProcessingService:
         return None
 
     @classmethod
-    def _search_classification(cls, value: Any) -> str | None:
+    def _iter_text_fragments(cls, value: Any, *, prefer_keys: bool = False) -> Iterator[str]:
+        """Yield every string in ``value`` depth-first.
+
+        With ``prefer_keys`` the explicit response/output keys of a mapping are
+        visited before its remaining entries, so each node is walked only once.
+        """
+
         if isinstance(value, str):
-            match = CLASSIFICATION_PATTERN.search(value)
-            if match:
-                return match.group(1).upper()
-            return None
-        if isinstance(value, dict):
-            for item in value.values():
-                result = cls._search_classification(item)
-                if result:
-                    return result
+            yield value
+        elif isinstance(value, dict):
+            if prefer_keys:
+                for key in CLASSIFICATION_PREFERRED_KEYS:
+                    if key in value:
+                        yield from cls._iter_text_fragments(value[key])
+                for key, item in value.items():
+                    if key not in CLASSIFICATION_PREFERRED_KEYS:
+                        yield from cls._iter_text_fragments(item)
+            else:
+                for item in value.values():
+                    yield from cls._iter_text_fragments(item)
         elif isinstance(value, (list, tuple, set)):
             for item in value:
-                result = cls._search_classification(item)
-                if result:
-                    return result
-        return None
+                yield from cls._iter_text_fragments(item, prefer_keys=prefer_keys)
 
     @classmethod
     def _extract_classification(cls, response_payload: Any) -> str | None:
-        if response_payload is None:
-            return None
-        if isinstance(response_payload, str):
-            return cls._search_classification(response_payload)
-        if isinstance(response_payload, dict):
-            # Prefer explicit response/output keys when present.
-            for key in ("response", "output", "choices", "content"):
-                if key in response_payload:
-                    result = cls._search_classification(response_payload[key])
-                    if result:
-                        return result
-            return cls._search_classification(response_payload)
-        if isinstance(response_payload, (list, tuple, set)):
-            for item in response_payload:
-                result = cls._extract_classification(item)
-                if result:
-                    return result
+        for fragment in cls._iter_text_fragments(response_payload, prefer_keys=True):
+            match = CLASSIFICATION_PATTERN.search(fragment)
+            if match:
+                return match.group(1).upper()
         return None
 
     @staticmethod
@@ -298,7 +298,12 @@ class OpenAIImageProcessingService:
         model = metadata.get("model", self._default_model)
         chunk_size = int(metadata.get("chunk_size", self._chunk_size))
 
-        self._log.debug("Uploading image '%s' in %d byte chunks", payload.filename, chunk_size)
+        self._log.debug(
+            "Uploading image '%s' (%d bytes) in %d byte chunks",
+            payload.filename,
+            payload.size,
+            chunk_size,
+        )
 
         client = self._client
         if client is None:
@@ -422,6 +427,10 @@ class BackgroundTaskManager:
 
         try:
             result = await self._image_service.generate(task_info.metadata, payload)
+        except asyncio.CancelledError:
+            self._log.warning("Task %s was cancelled", task_id)
+            task_info.mark_failed("Task was cancelled")
+            raise
         except Exception as exc:  # pragma: no cover - defensive logging
             message = str(exc)
             self._log.exception("Task %s failed: %s", task_id, message)
@@ -429,6 +438,9 @@ class BackgroundTaskManager:
         else:
             self._log.info("Task %s completed", task_id)
             task_info.mark_completed(result)
+        finally:
+            # Waiters block on the event rather than polling, so it must fire on every exit path.
+            task_info.signal_completion()
 
     async def get_status(self, task_id: str) -> dict[str, Any]:
         """Return the latest status for ``task_id``."""
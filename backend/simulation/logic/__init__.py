@@ -5,10 +5,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from dataclasses import replace
 from enum import IntEnum
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Callable
 from typing import Dict
 from typing import Iterable
 from typing import List
+from typing import Mapping
 from typing import Optional
 from typing import Sequence
 from typing import Tuple
@@ -32,7 +35,7 @@ class LogicProbe:
 
 
 @dataclass_json
-@dataclass
+@dataclass(frozen=True, slots=True)
 class GridLocation:
     """Simple integer based coordinate used to place nodes on a 2D grid."""
 
@@ -43,12 +46,27 @@ class GridLocation:
         if not isinstance(self.x, int) or not isinstance(self.y, int):
             raise TypeError("GridLocation coordinates must be integers")
 
+    @classmethod
+    def interned(cls, x: int, y: int) -> "GridLocation":
+        """Return a shared, immutable location for ``(x, y)``.
+
+        Locations are frozen, so movement code can reuse one instance per tile
+        instead of allocating a new one on every step.
+        """
+
+        return _interned_location(x, y)
+
     def translated(self, dx: int, dy: int) -> "GridLocation":
-        """Return a new location offset by the provided deltas."""
+        """Return a location offset by the provided deltas."""
 
         if not isinstance(dx, int) or not isinstance(dy, int):
             raise TypeError("GridLocation translation requires integer deltas")
-        return GridLocation(self.x + dx, self.y + dy)
+        return _interned_location(self.x + dx, self.y + dy)
+
+
+@lru_cache(maxsize=4096)
+def _interned_location(x: int, y: int) -> GridLocation:
+    return GridLocation(x, y)
 
 
 class Action(IntEnum):
@@ -70,8 +88,22 @@ _ACTION_TO_VECTOR: Dict[Action, Tuple[int, int]] = {
     Action.MOVE_RIGHT: (1, 0),
 }
 
+# Bit for each action in a Surroundings mask, in action-value (and field) order.
+_ACTION_BITS: Tuple[int, ...] = tuple(1 << action for action in Action)
+
+# Movement deltas indexed by action value so hot loops can skip the enum
+# lookup; ``None`` marks actions that keep the node in place.
+_ACTION_DELTAS: Tuple[Optional[Tuple[int, int]], ...] = tuple(
+    _ACTION_TO_VECTOR.get(action) for action in Action
+)
 
-def _default_logger(message: str) -> None:
+
+# Log callbacks follow the ``logging.Logger.debug`` signature: a %-style message
+# followed by its arguments, so formatting only happens when a sink records it.
+LogCallback = Callable[..., None]
+
+
+def _default_logger(message: str, *args: object) -> None:
     """No-op logger used when a caller does not provide a callback."""
 
     # Intentionally left blank – satisfies the logging callback contract.
@@ -113,6 +145,12 @@ class Surroundings:
                 mask |= 1 << index
         return mask
 
+    @classmethod
+    def from_mask(cls, mask: int) -> "Surroundings":
+        """Build surroundings from a value produced by :meth:`action_mask`."""
+
+        return cls(*[bool(mask & bit) for bit in _ACTION_BITS])
+
     def available_actions(self) -> List[int]:
         """Return the integer identifiers for actions that can be taken."""
 
@@ -229,7 +267,7 @@ class GridWorldEnvironment:
         width: int,
         height: int,
         rewards: Optional[Dict[Tuple[int, int], int]] = None,
-        log_callback: Optional[Callable[[str], None]] = None,
+        log_callback: Optional[LogCallback] = None,
     ) -> None:
         if not isinstance(width, int) or width <= 0:
             raise ValueError("width must be a positive integer")
@@ -241,8 +279,12 @@ class GridWorldEnvironment:
             (int(x), int(y)): int(value)
             for (x, y), value in (rewards or {}).items()
         }
+        self._initial_rewards = dict(self._rewards)
         self._log = log_callback or _default_logger
         self._node_states: Dict[str, MeshtasticNode] = {}
+        # Surroundings depend only on the grid size, so each tile's encoded state,
+        # available actions and action mask are computed once and reused.
+        self._tile_cache: Dict[Tuple[int, int], Tuple[int, int]] = {}
 
     def _within_bounds(self, location: GridLocation) -> bool:
         return 0 <= location.x < self.width and 0 <= location.y < self.height
@@ -263,25 +305,37 @@ class GridWorldEnvironment:
     def surroundings_for(self, location: GridLocation) -> Surroundings:
         """Return the available actions for a node at the supplied location."""
 
-        if not self._within_bounds(location):
-            raise ValueError("location must be within the grid bounds")
-        if self._is_border(location):
-            raise ValueError("location must not be on the impassable border")
-        return Surroundings(
-            can_move_forward=self.is_passable(location.translated(0, -1)),
-            can_move_backward=self.is_passable(location.translated(0, 1)),
-            can_move_left=self.is_passable(location.translated(-1, 0)),
-            can_move_right=self.is_passable(location.translated(1, 0)),
-            can_do_work=True,
-            can_stop=True,
-            can_call_for_help=True,
-        )
+        return Surroundings.from_mask(self._tile_info(location)[1])
+
+    def _tile_info(self, location: GridLocation) -> Tuple[int, int]:
+        coordinate = (location.x, location.y)
+        cached = self._tile_cache.get(coordinate)
+        if cached is None:
+            # Only valid tiles are ever cached, so validation runs on a miss.
+            if not self._within_bounds(location):
+                raise ValueError("location must be within the grid bounds")
+            if self._is_border(location):
+                raise ValueError("location must not be on the impassable border")
+            surroundings = Surroundings(
+                can_move_forward=self.is_passable(location.translated(0, -1)),
+                can_move_backward=self.is_passable(location.translated(0, 1)),
+                can_move_left=self.is_passable(location.translated(-1, 0)),
+                can_move_right=self.is_passable(location.translated(1, 0)),
+                can_do_work=True,
+                can_stop=True,
+                can_call_for_help=True,
+            )
+            cached = (
+                NodeState(location, surroundings).encode(self.width),
+                surroundings.action_mask(),
+            )
+            self._tile_cache[coordinate] = cached
+        return cached
 
     def encode_state(self, location: GridLocation) -> int:
         """Encode the state represented by a location and its surroundings."""
 
-        surroundings = self.surroundings_for(location)
-        return NodeState(location, surroundings).encode(self.width)
+        return self._tile_info(location)[0]
 
     def reward_at(self, location: GridLocation) -> int:
         """Return the reward associated with the given grid location."""
@@ -306,6 +360,17 @@ class GridWorldEnvironment:
 
         return dict(self._rewards)
 
+    def reset(self) -> None:
+        """Forget tracked nodes and restore the rewards supplied at construction.
+
+        The cached tile data only depends on the grid size, so it survives a
+        reset and the environment can be reused for the next episode.
+        """
+
+        self._node_states.clear()
+        self._rewards.clear()
+        self._rewards.update(self._initial_rewards)
+
     def step(
         self,
         node: MeshtasticNode,
@@ -338,21 +403,21 @@ class GridWorldEnvironment:
         self._node_states[node.identifier] = active_node
 
         surroundings = self.surroundings_for(active_node.location)
-        available_actions = surroundings.available_actions()
-        if action not in available_actions:
+        if action not in surroundings.available_actions():
             self._log(
-                f"Action {resolved_action.name} is unavailable at location {active_node.location}"
+                "Action %s is unavailable at location %s",
+                resolved_action.name,
+                active_node.location,
             )
             self._node_states[node.identifier] = active_node
             return self.encode_state(active_node.location), active_node, -1, False
 
-        if resolved_action in _ACTION_TO_VECTOR:
-            dx, dy = _ACTION_TO_VECTOR[resolved_action]
+        delta = _ACTION_DELTAS[action]
+        if delta is not None:
+            dx, dy = delta
             new_location = active_node.location.translated(dx, dy)
             if not self.is_passable(new_location):
-                self._log(
-                    "Attempted to move into impassable border at %s", new_location
-                )
+                self._log("Attempted to move into impassable border at %s", new_location)
                 self._node_states[node.identifier] = active_node
                 return self.encode_state(active_node.location), active_node, -1, False
             reward = self.reward_at(new_location)
@@ -370,9 +435,7 @@ class GridWorldEnvironment:
             return self.encode_state(active_node.location), active_node, 0, True
 
         if resolved_action is Action.CALL_FOR_HELP:
-            self._log(
-                f"Node {node.identifier} requested assistance at {active_node.location}"
-            )
+            self._log("Node %s requested assistance at %s", node.identifier, active_node.location)
             self._node_states[node.identifier] = active_node
             return self.encode_state(active_node.location), active_node, -1, False
 
@@ -388,7 +451,7 @@ class QLearningAgent:
         learning_rate: float = 0.1,
         discount_factor: float = 0.9,
         exploration_rate: float = 0.1,
-        log_callback: Optional[Callable[[str], None]] = None,
+        log_callback: Optional[LogCallback] = None,
     ) -> None:
         if not 0 < learning_rate <= 1:
             raise ValueError("learning_rate must be within the range (0, 1]")
@@ -407,6 +470,15 @@ class QLearningAgent:
 
         return self._q_table.get(state, {}).get(action, 0.0)
 
+    def action_values(self, state: int) -> Mapping[int, float]:
+        """Return a read-only view of the learned Q-values for ``state``.
+
+        Actions that have never been updated are absent and should be treated
+        as ``0.0``, matching :meth:`get_q_value`.
+        """
+
+        return MappingProxyType(self._q_table.get(state, {}))
+
     def _set_q_value(self, state: int, action: int, value: float) -> None:
         state_values = self._q_table.setdefault(state, {})
         state_values[action] = float(value)
@@ -426,14 +498,12 @@ class QLearningAgent:
             raise ValueError("exploration_rate must be within the range [0, 1]")
         if random.random() < epsilon:
             return int(random.choice(list(available_actions)))
-        best_action = int(available_actions[0])
-        best_value = self.get_q_value(state, best_action)
-        for candidate in available_actions[1:]:
-            candidate_value = self.get_q_value(state, int(candidate))
-            if candidate_value > best_value:
-                best_value = candidate_value
-                best_action = int(candidate)
-        return best_action
+        state_values = self._q_table.get(state)
+        if not state_values:
+            # Every action is still at its 0.0 default, so the first one wins the tie.
+            return int(available_actions[0])
+        # ``max`` keeps the first of equal keys, matching the earlier strict ``>`` scan.
+        return int(max(available_actions, key=lambda action: state_values.get(action, 0.0)))
 
     def learn(
         self,
@@ -446,11 +516,11 @@ class QLearningAgent:
         """Update the Q-table based on an observed transition."""
 
         current_q = self.get_q_value(state, action)
-        next_values = [
-            self.get_q_value(next_state, int(next_action))
-            for next_action in next_available_actions or []
-        ]
-        best_next_q = max(next_values) if next_values else 0.0
+        next_state_values = self._q_table.get(next_state, {})
+        best_next_q = max(
+            (next_state_values.get(int(next_action), 0.0) for next_action in next_available_actions or []),
+            default=0.0,
+        )
         updated_q = (1 - self.learning_rate) * current_q + self.learning_rate * (
             reward + self.discount_factor * best_next_q
         )
@@ -475,4 +545,5 @@ __all__ = [
     "NodeState",
     "GridWorldEnvironment",
     "QLearningAgent",
+    "LogCallback",
 ]
@@ -2,22 +2,31 @@
 
 from __future__ import annotations
 
+import json
 import random
 from dataclasses import dataclass
-from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
+from dataclasses_json import DataClassJsonMixin
 from dataclasses_json import dataclass_json
 
 from .logic import Action
 from .logic import GridLocation
 from .logic import GridWorldEnvironment
+from .logic import LogCallback
 from .logic import MeshtasticNode
 from .logic import QLearningAgent
+from .logic import _ACTION_DELTAS
 from .logic import _ACTION_TO_VECTOR
 from .logic import _default_logger
 
 
-CoordinateSet = Set[Tuple[int, int]]
+# Tiles are tracked by their row-major index (``y * width + x``) so membership
+# checks hash a single int instead of allocating and hashing a tuple.
+CoordinateSet = Set[int]
+_MOVEMENT_ACTIONS = frozenset(int(action) for action in _ACTION_TO_VECTOR)
+# Row-major ``width * height`` bitmap; a non-zero byte marks a tile held by an agent.
+OccupancyGrid = bytearray
 
 
 @dataclass_json
@@ -38,9 +47,8 @@ class RewardTile:
     value: int
 
 
-@dataclass_json
 @dataclass
-class SimulationSnapshot:
+class SimulationSnapshot(DataClassJsonMixin):
     """Serializable view of the current simulation state."""
 
     grid: SimulationGrid
@@ -49,6 +57,39 @@ class SimulationSnapshot:
     rewards: List[RewardTile]
     alerts: Dict[str, str]
 
+    def to_json(self, **kwargs: Any) -> str:  # type: ignore[override]
+        """Encode the snapshot as JSON without the reflective ``to_dict`` walk.
+
+        Snapshots are broadcast every tick, so the payload is assembled from
+        known fields directly. The output matches ``to_dict`` field for field.
+        """
+
+        return json.dumps(self._as_primitive(), **kwargs)
+
+    def _as_primitive(self) -> Dict[str, Any]:
+        return {
+            "grid": {"width": self.grid.width, "height": self.grid.height},
+            "cats": [_node_primitive(node) for node in self.cats],
+            "dogs": [_node_primitive(node) for node in self.dogs],
+            "rewards": [
+                {
+                    "location": {"x": tile.location.x, "y": tile.location.y},
+                    "value": tile.value,
+                }
+                for tile in self.rewards
+            ],
+            "alerts": dict(self.alerts),
+        }
+
+
+def _node_primitive(node: MeshtasticNode) -> Dict[str, Any]:
+    return {
+        "identifier": node.identifier,
+        "battery_level": node.battery_level,
+        "compute_efficiency_flops_per_milliamp": node.compute_efficiency_flops_per_milliamp,
+        "location": {"x": node.location.x, "y": node.location.y},
+    }
+
 
 class MeshSimulation:
     """Lightweight runtime that coordinates cats and dogs on a grid."""
@@ -62,7 +103,7 @@ class MeshSimulation:
         *,
         cat_count: int = 5,
         dog_count: int = 1,
-        log_callback: Optional[Callable[[str], None]] = None,
+        log_callback: Optional[LogCallback] = None,
         random_seed: Optional[int] = None,
         reward_tiles: Optional[Sequence[Union["RewardTile", Tuple[int, int, int]]]] = None,
         positive_reward_count: int = 0,
@@ -91,13 +132,19 @@ class MeshSimulation:
         self._grid = SimulationGrid(width=width, height=height)
         self._log = log_callback or _default_logger
         self._rng = random.Random(random_seed)
-        self._reward_tiles = self._initialize_reward_tiles(
-            reward_tiles or [],
-            positive_reward_count=positive_reward_count,
-            negative_reward_count=negative_reward_count,
-            positive_reward_value=positive_reward_value,
-            negative_reward_value=negative_reward_value,
-        )
+        # Keyed by coordinate so placing or consuming a tile is O(1); dict order
+        # keeps the snapshot listing stable.
+        self._reward_tiles: Dict[Tuple[int, int], RewardTile] = {
+            (tile.location.x, tile.location.y): tile
+            for tile in self._initialize_reward_tiles(
+                reward_tiles or [],
+                positive_reward_count=positive_reward_count,
+                negative_reward_count=negative_reward_count,
+                positive_reward_value=positive_reward_value,
+                negative_reward_value=negative_reward_value,
+            )
+        }
+        self._reward_list: Optional[List[RewardTile]] = None
         self._alerts: Dict[str, str] = {}
         self._environment = GridWorldEnvironment(
             width,
@@ -110,6 +157,8 @@ class MeshSimulation:
         self._dog_idle_chance = 0.45
         self._dog_move_interval = 3
         self._models: Dict[str, QLearningAgent] = {}
+        self._occupancy: OccupancyGrid = bytearray(width * height)
+        self._empty_occupancy = bytes(width * height)
 
         occupied: CoordinateSet = set()
         self._cats = self._spawn_agents(
@@ -124,18 +173,30 @@ class MeshSimulation:
         )
 
         self._log(
-            f"Initialized mesh simulation: {cat_count} cats, {dog_count} dogs on {width}x{height} grid"
+            "Initialized mesh simulation: %s cats, %s dogs on %sx%s grid",
+            cat_count,
+            dog_count,
+            width,
+            height,
         )
 
     def snapshot(self) -> SimulationSnapshot:
-        """Return a serializable snapshot of the current world state."""
+        """Return a serializable snapshot of the current world state.
+
+        The snapshot shares its collections with the simulation instead of
+        copying them, so callers must treat them as read-only. This is safe
+        because every tick builds new agent lists, and the reward list and
+        alert mapping are replaced rather than mutated when they change.
+        """
 
+        if self._reward_list is None:
+            self._reward_list = list(self._reward_tiles.values())
         return SimulationSnapshot(
             grid=self._grid,
-            cats=list(self._cats),
-            dogs=list(self._dogs),
-            rewards=list(self._reward_tiles),
-            alerts=dict(self._alerts),
+            cats=self._cats,
+            dogs=self._dogs,
+            rewards=self._reward_list,
+            alerts=self._alerts,
         )
 
     @property
@@ -156,9 +217,7 @@ class MeshSimulation:
             validated[identifier] = model
         self._models = validated
         if validated:
-            self._log(
-                f"Registered {len(validated)} Q-learning model(s) for mesh simulation"
-            )
+            self._log("Registered %s Q-learning model(s) for mesh simulation", len(validated))
 
     def add_reward_tile(self, location: GridLocation, value: int) -> None:
         """Add or update a reward tile on the grid interior."""
@@ -170,18 +229,8 @@ class MeshSimulation:
         if not self._is_interior(location):
             raise ValueError("Rewards must be placed within the traversable interior")
 
-        tile = RewardTile(location=location, value=value)
-        replaced = False
-        updated: List[RewardTile] = []
-        for existing in self._reward_tiles:
-            if existing.location == location:
-                updated.append(tile)
-                replaced = True
-            else:
-                updated.append(existing)
-        if not replaced:
-            updated.append(tile)
-        self._reward_tiles = updated
+        self._reward_tiles[(location.x, location.y)] = RewardTile(location=location, value=value)
+        self._reward_list = None
         self._environment.set_reward(location, value)
 
     def step(self) -> SimulationSnapshot:
@@ -189,23 +238,20 @@ class MeshSimulation:
 
         self._tick += 1
 
-        occupied_for_cats = {
-            (dog.location.x, dog.location.y) for dog in self._dogs
-        }
+        # One occupancy bitmap serves the whole tick: ``_advance_group`` moves each
+        # agent's mark as it steps, so dogs see the cats' updated positions.
+        occupied = self._occupancy
+        occupied[:] = self._empty_occupancy
+        width = self._grid.width
+        for node in (*self._cats, *self._dogs):
+            occupied[node.location.y * width + node.location.x] = 1
         self._cats = self._advance_group(
             self._cats,
-            occupied_for_cats,
+            occupied,
             agent_type="cat",
             idle_probability=self._cat_idle_chance,
         )
 
-        occupied_for_dogs: CoordinateSet = {
-            (cat.location.x, cat.location.y) for cat in self._cats
-        }
-        occupied_for_dogs.update(
-            (dog.location.x, dog.location.y) for dog in self._dogs
-        )
-
         dog_idle_probability = (
             self._dog_idle_chance
             if self._tick % self._dog_move_interval == 0
@@ -213,12 +259,12 @@ class MeshSimulation:
         )
         self._dogs = self._advance_group(
             self._dogs,
-            occupied_for_dogs,
+            occupied,
             agent_type="dog",
             idle_probability=dog_idle_probability,
         )
 
-        self._log(f"Simulation tick advanced to {self._tick}")
+        self._log("Simulation tick advanced to %s", self._tick)
         return self.snapshot()
 
     # ------------------------------------------------------------------
@@ -244,7 +290,7 @@ class MeshSimulation:
                 ),
                 location=location,
             )
-            occupied.add((location.x, location.y))
+            occupied.add(self._tile_index(location.x, location.y))
             agents.append(node)
         return agents
 
@@ -255,53 +301,69 @@ class MeshSimulation:
         limit = max(1, interior_width * interior_height * 2)
         while attempts < limit:
             attempts += 1
-            candidate = GridLocation(
-                1 + self._rng.randrange(interior_width),
-                1 + self._rng.randrange(interior_height),
-            )
-            if (candidate.x, candidate.y) not in occupied:
-                return candidate
+            x = 1 + self._rng.randrange(interior_width)
+            y = 1 + self._rng.randrange(interior_height)
+            if self._tile_index(x, y) not in occupied:
+                return GridLocation.interned(x, y)
 
         for y in range(1, self._grid.height - 1):
             for x in range(1, self._grid.width - 1):
-                if (x, y) not in occupied:
-                    return GridLocation(x, y)
+                if self._tile_index(x, y) not in occupied:
+                    return GridLocation.interned(x, y)
 
         raise RuntimeError("Unable to place additional agents on the grid")
 
     def _advance_group(
         self,
         nodes: Sequence[MeshtasticNode],
-        occupied: CoordinateSet,
+        occupied: OccupancyGrid,
         *,
         agent_type: str,
         idle_probability: float,
     ) -> List[MeshtasticNode]:
+        width = self._grid.width
+        idle_rolls = self._draw_idle_rolls(len(nodes), idle_probability)
         updated: List[MeshtasticNode] = []
-        for node in nodes:
-            occupied.discard((node.location.x, node.location.y))
+        for node, idle_roll in zip(nodes, idle_rolls):
+            occupied[node.location.y * width + node.location.x] = 0
             next_node = self._move_node(
                 node,
                 occupied,
                 agent_type=agent_type,
                 idle_probability=idle_probability,
+                idle_roll=idle_roll,
             )
-            occupied.add((next_node.location.x, next_node.location.y))
+            occupied[next_node.location.y * width + next_node.location.x] = 1
             updated.append(next_node)
         return updated
 
+    def _draw_idle_rolls(self, count: int, idle_probability: float) -> List[float]:
+        """Draw the idle roll for each of ``count`` agents in a single pass.
+
+        When the probability is 0 or 1 the outcome is fixed, so no random
+        numbers are consumed and a constant roll of ``0.0`` is returned.
+        """
+
+        if idle_probability <= 0.0 or idle_probability >= 1.0:
+            return [0.0] * count
+        random = self._rng.random
+        return [random() for _ in range(count)]
+
     def _move_node(
         self,
         node: MeshtasticNode,
-        occupied: CoordinateSet,
+        occupied: OccupancyGrid,
         *,
         agent_type: str,
         idle_probability: float,
+        idle_roll: Optional[float] = None,
     ) -> MeshtasticNode:
         idle_probability = float(idle_probability)
         idle_probability = min(max(idle_probability, 0.0), 1.0)
 
-        if self._rng.random() < idle_probability:
+        if idle_roll is None:
+            idle_roll = self._rng.random()
+        if idle_roll < idle_probability:
             if agent_type == "dog":
                 self._clear_alert(node.identifier)
             return self._drain_battery(node)
@@ -316,7 +378,10 @@ class MeshSimulation:
             reward_here = self._environment.reward_at(node.location)
             if reward_here > 0 and int(Action.DO_WORK) in actions:
                 self._log(
-                    f"Cat {node.identifier} discovered reward tile worth {reward_here} at {node.location}"
+                    "Cat %s discovered reward tile worth %s at %s",
+                    node.identifier,
+                    reward_here,
+                    node.location,
                 )
                 _, working_node, reward, _ = self._environment.step(
                     node,
@@ -333,18 +398,13 @@ class MeshSimulation:
         )
 
         for action in ranked_actions:
-            try:
-                resolved_action = Action(int(action))
-            except ValueError:
+            if not 0 <= action < len(_ACTION_DELTAS):
                 continue
 
-            if resolved_action in _ACTION_TO_VECTOR:
-                dx, dy = _ACTION_TO_VECTOR[resolved_action]
-                candidate_position = (
-                    node.location.x + dx,
-                    node.location.y + dy,
-                )
-                if candidate_position in occupied:
+            delta = _ACTION_DELTAS[action]
+            if delta is not None:
+                dx, dy = delta
+                if occupied[(node.location.y + dy) * self._grid.width + node.location.x + dx]:
                     continue
 
             _, candidate, _, _ = self._environment.step(node, int(action))
@@ -373,7 +433,8 @@ class MeshSimulation:
         model = self._models.get(node.identifier)
         if model is None:
             self._log(
-                f"[mesh-warning] Node {node.identifier} lacks a trained model; broadcasting stop request"
+                "[mesh-warning] Node %s lacks a trained model; broadcasting stop request",
+                node.identifier,
             )
             self._broadcast_model_request(node)
             return self._fallback_actions(available_actions, allow_stop=allow_stop)
@@ -382,7 +443,8 @@ class MeshSimulation:
             state = self._environment.encode_state(node.location)
         except ValueError:
             self._log(
-                f"[mesh-warning] Unable to encode state for node {node.identifier}; requesting assistance"
+                "[mesh-warning] Unable to encode state for node %s; requesting assistance",
+                node.identifier,
             )
             self._broadcast_model_request(node)
             return self._fallback_actions(available_actions, allow_stop=allow_stop)
@@ -390,14 +452,16 @@ class MeshSimulation:
         policy_action = model.policy(state)
         if policy_action is None:
             self._log(
-                f"[mesh-warning] Model for node {node.identifier} has no policy; requesting assistance"
+                "[mesh-warning] Model for node %s has no policy; requesting assistance",
+                node.identifier,
             )
             self._broadcast_model_request(node)
             return self._fallback_actions(available_actions, allow_stop=allow_stop)
 
+        action_values = model.action_values(state)
         ranked = sorted(
             filtered_actions if filtered_actions else [int(action) for action in available_actions],
-            key=lambda action: model.get_q_value(state, int(action)),
+            key=lambda action: action_values.get(action, 0.0),
             reverse=True,
         )
 
@@ -410,7 +474,8 @@ class MeshSimulation:
 
         if not ranked or preferred_action is None or preferred_action not in ranked:
             self._log(
-                f"[mesh-warning] Model for node {node.identifier} proposed unavailable action; requesting assistance"
+                "[mesh-warning] Model for node %s proposed unavailable action; requesting assistance",
+                node.identifier,
             )
             self._broadcast_model_request(node)
             return self._fallback_actions(available_actions, allow_stop=allow_stop)
@@ -431,16 +496,15 @@ class MeshSimulation:
         if not actions:
             return []
 
-        movement_codes = {int(action) for action in _ACTION_TO_VECTOR}
         movement_actions = [
-            action for action in actions if action in movement_codes
+            action for action in actions if action in _MOVEMENT_ACTIONS
         ]
         self._rng.shuffle(movement_actions)
 
         non_movement_actions = [
             action
             for action in actions
-            if action not in movement_codes and action != int(Action.STOP)
+            if action not in _MOVEMENT_ACTIONS and action != int(Action.STOP)
         ]
 
         ordered: List[int] = []
@@ -456,23 +520,18 @@ class MeshSimulation:
         self,
         node: MeshtasticNode,
         available_actions: Sequence[int],
-        occupied: CoordinateSet,
+        occupied: OccupancyGrid,
     ) -> MeshtasticNode:
         movement_actions = [
             int(action)
             for action in available_actions
-            if int(action) in {int(a) for a in _ACTION_TO_VECTOR}
+            if int(action) in _MOVEMENT_ACTIONS
         ]
         if movement_actions:
             self._rng.shuffle(movement_actions)
             for action in movement_actions:
-                resolved = Action(int(action))
-                dx, dy = _ACTION_TO_VECTOR[resolved]
-                candidate_position = (
-                    node.location.x + dx,
-                    node.location.y + dy,
-                )
-                if candidate_position in occupied:
+                dx, dy = _ACTION_DELTAS[action]
+                if occupied[(node.location.y + dy) * self._grid.width + node.location.x + dx]:
                     continue
                 _, candidate, _, _ = self._environment.step(node, int(action))
                 return self._drain_battery(candidate)
@@ -485,7 +544,8 @@ class MeshSimulation:
             return self._drain_battery(working_node)
 
         self._log(
-            f"[mesh-info] Cat {node.identifier} maintaining position due to lack of viable actions"
+            "[mesh-info] Cat %s maintaining position due to lack of viable actions",
+            node.identifier,
         )
         return self._drain_battery(node)
 
@@ -501,7 +561,8 @@ class MeshSimulation:
             )
 
         self._log(
-            f"[mesh-info] Cat {node.identifier} encountered no available actions; remaining on station"
+            "[mesh-info] Cat %s encountered no available actions; remaining on station",
+            node.identifier,
         )
         return self._drain_battery(node)
 
@@ -520,39 +581,42 @@ class MeshSimulation:
         *,
         reason: str,
     ) -> MeshtasticNode:
-        self._log(f"[mesh-warning] {reason} for node {node.identifier}")
+        self._log("[mesh-warning] %s for node %s", reason, node.identifier)
         self._broadcast_model_request(node)
         _, halted_node, _, _ = self._environment.step(node, int(Action.STOP))
         return self._drain_battery(halted_node)
 
     def _broadcast_model_request(self, node: MeshtasticNode) -> None:
         self._log(
-            f"Node {node.identifier} is requesting updated Q-learning model via mesh network"
+            "Node %s is requesting updated Q-learning model via mesh network",
+            node.identifier,
         )
 
     def _broadcast_state_update(self, node: MeshtasticNode, reward: int) -> None:
         self._log(
-            f"Node {node.identifier} broadcast state update after consuming reward {reward} at {node.location}"
+            "Node %s broadcast state update after consuming reward %s at %s",
+            node.identifier,
+            reward,
+            node.location,
         )
 
     def _consume_reward_tile(self, location: GridLocation, reward_value: int) -> None:
         if reward_value == 0:
             return
         self._environment.set_reward(location, 0)
-        self._reward_tiles = [
-            tile for tile in self._reward_tiles if tile.location != location
-        ]
+        if self._reward_tiles.pop((location.x, location.y), None) is not None:
+            self._reward_list = None
 
     def _set_alert(self, identifier: str, message: str) -> None:
-        self._alerts[identifier] = message
-        self._log(
-            f"[mesh-info] Node {identifier} entered alert state: {message}"
-        )
+        self._alerts = {**self._alerts, identifier: message}
+        self._log("[mesh-info] Node %s entered alert state: %s", identifier, message)
 
     def _clear_alert(self, identifier: str) -> None:
         if identifier in self._alerts:
-            self._alerts.pop(identifier, None)
-            self._log(f"[mesh-info] Node {identifier} cleared alert state")
+            self._alerts = {
+                key: value for key, value in self._alerts.items() if key != identifier
+            }
+            self._log("[mesh-info] Node %s cleared alert state", identifier)
 
     def _drain_battery(self, node: MeshtasticNode) -> MeshtasticNode:
         drain_amount = self._rng.uniform(0.05, 0.35)
@@ -572,7 +636,7 @@ class MeshSimulation:
         negative_reward_value: int,
     ) -> List[RewardTile]:
         tiles: List[RewardTile] = []
-        occupied: Set[Tuple[int, int]] = set()
+        occupied: CoordinateSet = set()
 
         for tile in explicit_tiles:
             if isinstance(tile, RewardTile):
@@ -580,10 +644,10 @@ class MeshSimulation:
                 value = tile.value
             else:
                 x, y, value = tile
-                location = GridLocation(int(x), int(y))
+                location = GridLocation.interned(int(x), int(y))
             if not self._is_interior(location):
                 raise ValueError("Reward tiles must be placed within the grid interior")
-            coordinate = (location.x, location.y)
+            coordinate = self._tile_index(location.x, location.y)
             if coordinate in occupied:
                 raise ValueError("Duplicate reward tile location specified")
             occupied.add(coordinate)
@@ -610,41 +674,42 @@ class MeshSimulation:
         *,
         count: int,
         value: int,
-        occupied: Set[Tuple[int, int]],
+        occupied: CoordinateSet,
     ) -> Iterable[RewardTile]:
         for _ in range(count):
             location = self._random_interior_location(occupied)
-            occupied.add((location.x, location.y))
+            occupied.add(self._tile_index(location.x, location.y))
             yield RewardTile(location=location, value=int(value))
 
-    def _random_interior_location(self, occupied: Set[Tuple[int, int]]) -> GridLocation:
+    def _random_interior_location(self, occupied: CoordinateSet) -> GridLocation:
         attempts = 0
         interior_width = self._grid.width - 2
         interior_height = self._grid.height - 2
         limit = max(1, interior_width * interior_height * 2)
         while attempts < limit:
             attempts += 1
-            candidate = GridLocation(
-                1 + self._rng.randrange(interior_width),
-                1 + self._rng.randrange(interior_height),
-            )
-            if (candidate.x, candidate.y) not in occupied:
-                return candidate
+            x = 1 + self._rng.randrange(interior_width)
+            y = 1 + self._rng.randrange(interior_height)
+            if self._tile_index(x, y) not in occupied:
+                return GridLocation.interned(x, y)
 
         for y in range(1, self._grid.height - 1):
             for x in range(1, self._grid.width - 1):
-                if (x, y) not in occupied:
-                    return GridLocation(x, y)
+                if self._tile_index(x, y) not in occupied:
+                    return GridLocation.interned(x, y)
 
         raise RuntimeError("Unable to place reward tiles on the grid")
 
+    def _tile_index(self, x: int, y: int) -> int:
+        return y * self._grid.width + x
+
     def _is_interior(self, location: GridLocation) -> bool:
         return 0 < location.x < self._grid.width - 1 and 0 < location.y < self._grid.height - 1
 
     def _reward_lookup(self) -> Dict[Tuple[int, int], int]:
         return {
-            (tile.location.x, tile.location.y): int(tile.value)
-            for tile in self._reward_tiles
+            coordinate: int(tile.value)
+            for coordinate, tile in self._reward_tiles.items()
         }
 
 
@@ -0,0 +1,48 @@
+"""Minimal call recorder used in place of ``unittest.mock`` spies."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple
+
+
+class Call(NamedTuple):
+    """Arguments captured for a single invocation."""
+
+    args: tuple[Any, ...]
+    kwargs: dict[str, Any]
+
+
+class Spy:
+    """Forward calls to ``wrapped`` while recording their arguments."""
+
+    __slots__ = ("wrapped", "calls")
+
+    def __init__(self, wrapped: Callable[..., Any]) -> None:
+        self.wrapped = wrapped
+        self.calls: list[Call] = []
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        self.calls.append(Call(args, kwargs))
+        return self.wrapped(*args, **kwargs)
+
+    @property
+    def call_count(self) -> int:
+        return len(self.calls)
+
+
+@contextmanager
+def spy_on(target: object, name: str) -> Iterator[Spy]:
+    """Replace ``target.name`` with a :class:`Spy` for the duration of the block."""
+
+    shadowed = name in vars(target)
+    original = getattr(target, name)
+    spy = Spy(original)
+    setattr(target, name, spy)
+    try:
+        yield spy
+    finally:
+        if shadowed:
+            setattr(target, name, original)
+        else:
+            delattr(target, name)
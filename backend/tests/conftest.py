@@ -0,0 +1,34 @@
+"""Shared pytest configuration for the backend test suite."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.app import create_app
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Run ``@pytest.mark.anyio`` tests on asyncio, matching the FastAPI runtime."""
+
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app() -> FastAPI:
+    """Build the application once; its routes and schema do not vary between tests."""
+
+    return create_app()
+
+
+@pytest.fixture
+def client(app: FastAPI) -> Iterator[TestClient]:
+    """Yield a running test client and drop any per-test dependency overrides afterwards."""
+
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
@@ -2,15 +2,10 @@
 
 from fastapi.testclient import TestClient
 
-from api.app import create_app
 
-
-def test_health_endpoint_available() -> None:
+def test_health_endpoint_available(client: TestClient) -> None:
     """The health endpoint should respond with a 200 status and ok payload."""
 
-    app = create_app()
-    client = TestClient(app)
-
     response = client.get("/health")
 
     assert response.status_code == 200
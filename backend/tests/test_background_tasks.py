@@ -5,13 +5,16 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
-import time
-import unittest
+from dataclasses import FrozenInstanceError
+from functools import cached_property
 from types import SimpleNamespace
 from typing import Any
+
+import httpx
+import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
-from api.app import create_app
 from api.router import get_task_manager
 from api.tasks import (
     CLASSIFICATION_ATTRIBUTE_SOURCE,
@@ -24,6 +27,22 @@ from api.tasks import (
 JPEG_BYTES = b"\xff\xd8test-jpeg-data\xff\xd9"
 
 
+def _encode_task_form(metadata: str, file: tuple[str, bytes, str]) -> tuple[bytes, dict[str, str]]:
+    """Encode a ``POST /tasks`` multipart body once so tests can resend it as raw content."""
+
+    request = httpx.Request("POST", "http://testserver/tasks", data={"metadata": metadata}, files={"file": file})
+    return request.read(), {"Content-Type": request.headers["Content-Type"]}
+
+
+DESCRIBE_TASK_FORM = _encode_task_form(
+    json.dumps({"prompt": "describe"}),
+    ("image.jpg", JPEG_BYTES, "image/jpeg"),
+)
+INVALID_METADATA_FORM = _encode_task_form("not-json", ("image.jpg", JPEG_BYTES, "image/jpeg"))
+EMPTY_FILE_FORM = _encode_task_form(json.dumps({}), ("image.jpg", b"", "image/jpeg"))
+NON_JPEG_FORM = _encode_task_form(json.dumps({}), ("image.png", b"not-jpeg", "image/png"))
+
+
 class _StubImageService:
     def __init__(self, *, delay: float = 0.0) -> None:
         self.calls: list[tuple[dict[str, Any], ImagePayload]] = []
@@ -35,7 +54,7 @@ class _StubImageService:
             await asyncio.sleep(self.delay)
         return {
             "prompt": metadata.get("prompt"),
-            "size": len(payload.data),
+            "size": payload.size,
             "filename": payload.filename,
         }
 
@@ -45,11 +64,23 @@ class _FailingImageService:
         raise RuntimeError("boom")
 
 
+class _CancelledImageService:
+    async def generate(self, metadata: dict[str, Any], payload: ImagePayload) -> dict[str, Any]:  # noqa: ARG002
+        raise asyncio.CancelledError
+
+
 class _StubOpenAIClient:
     def __init__(self, response_payload: Any | None = None) -> None:
         self.upload_requests: list[tuple[str, bytes, str]] = []
-        self.files = self._Files(self.upload_requests)
-        self.responses = self._Responses(response_payload)
+        self._response_payload = response_payload
+
+    @cached_property
+    def files(self) -> _StubOpenAIClient._Files:
+        return self._Files(self.upload_requests)
+
+    @cached_property
+    def responses(self) -> _StubOpenAIClient._Responses:
+        return self._Responses(self._response_payload)
 
     class _Files:
         def __init__(self, upload_requests: list[tuple[str, bytes, str]]) -> None:
@@ -74,223 +105,227 @@ class _StubOpenAIClient:
             return SimpleNamespace(model_dump=lambda: payload)
 
 
-class ImagePayloadTests(unittest.TestCase):
-    def test_accepts_valid_jpeg_payload(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="photo.jpg",
-            content_type="image/jpeg",
-        )
-
-        self.assertEqual(payload.normalised_content_type(), "image/jpeg")
-
-    def test_allows_jpg_alias(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="photo.jpg",
-            content_type="image/jpg",
-        )
-
-        self.assertEqual(payload.normalised_content_type(), "image/jpeg")
-
-    def test_rejects_non_jpeg_extension(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="photo.png",
-            content_type="image/jpeg",
-        )
-
-        with self.assertRaises(ValueError):
-            payload.normalised_content_type()
-
-    def test_rejects_non_jpeg_content_type(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="photo.jpg",
-            content_type="image/png",
-        )
-
-        with self.assertRaises(ValueError):
-            payload.normalised_content_type()
-
-    def test_rejects_non_jpeg_data(self) -> None:
-        payload = ImagePayload(
-            data=b"not-jpeg",
-            filename="photo.jpg",
-            content_type="image/jpeg",
-        )
-
-        with self.assertRaises(ValueError):
-            payload.normalised_content_type()
-
-
-class BackgroundTaskManagerTests(unittest.IsolatedAsyncioTestCase):
-    async def asyncSetUp(self) -> None:
-        self.logger = logging.getLogger("test.background")
-
-    async def test_create_and_complete_task(self) -> None:
-        service = _StubImageService()
-        manager = BackgroundTaskManager(image_service=service, log_callback=self.logger)
-        payload = ImagePayload(data=JPEG_BYTES, filename="test.jpg", content_type="image/jpeg")
-        task_id = await manager.create_task({"prompt": "hello"}, payload)
-
-        status = await manager.wait_for_completion(task_id, timeout=1)
-
-        self.assertEqual(status["status"], "completed")
-        self.assertEqual(status["result"]["size"], len(JPEG_BYTES))
-        self.assertEqual(len(service.calls), 1)
-
-    async def test_task_failure_is_reported(self) -> None:
-        manager = BackgroundTaskManager(image_service=_FailingImageService(), log_callback=self.logger)
-        payload = ImagePayload(data=JPEG_BYTES, filename="broken.jpg", content_type="image/jpeg")
-        task_id = await manager.create_task({}, payload)
-
-        status = await manager.wait_for_completion(task_id, timeout=1)
-        self.assertEqual(status["status"], "failed")
-        self.assertIn("boom", status["error"])
-
-
-class OpenAIImageProcessingServiceTests(unittest.IsolatedAsyncioTestCase):
-    async def test_normalised_content_type_used_for_upload(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="photo.jpg",
-            content_type="image/jpg",
-        )
-        client = _StubOpenAIClient()
-        service = OpenAIImageProcessingService(client=client, log_callback=logging.getLogger("test.service"))
-
-        result = await service.generate({"prompt": "hi"}, payload)
-
-        self.assertEqual(result["file_id"], "file_123")
-        self.assertEqual(len(client.upload_requests), 1)
-        _, _, content_type = client.upload_requests[0]
-        self.assertEqual(content_type, "image/jpeg")
-
-    async def test_generate_adds_reward_from_classification(self) -> None:
-        payload = ImagePayload(
-            data=JPEG_BYTES,
-            filename="scene.jpg",
-            content_type="image/jpeg",
-        )
-        response_payload = {
-            "output": [
-                {
+@pytest.fixture
+def stub_client() -> _StubOpenAIClient:
+    return _StubOpenAIClient()
+
+
+@pytest.fixture
+def stub_service() -> _StubImageService:
+    return _StubImageService()
+
+
+@pytest.mark.parametrize(
+    ("filename", "content_type"),
+    [("photo.jpg", "image/jpeg"), ("photo.jpg", "image/jpg")],
+)
+def test_image_payload_accepts_jpeg(filename: str, content_type: str) -> None:
+    payload = ImagePayload(data=JPEG_BYTES, filename=filename, content_type=content_type)
+
+    assert payload.normalised_content_type() == "image/jpeg"
+
+
+@pytest.mark.parametrize(
+    ("data", "filename", "content_type"),
+    [
+        (JPEG_BYTES, "photo.png", "image/jpeg"),
+        (JPEG_BYTES, "photo.jpg", "image/png"),
+        (b"not-jpeg", "photo.jpg", "image/jpeg"),
+    ],
+    ids=["extension", "content-type", "data"],
+)
+def test_image_payload_rejects_non_jpeg(data: bytes, filename: str, content_type: str) -> None:
+    payload = ImagePayload(data=data, filename=filename, content_type=content_type)
+
+    with pytest.raises(ValueError):
+        payload.normalised_content_type()
+
+
+def test_image_payload_is_frozen() -> None:
+    payload = ImagePayload(data=JPEG_BYTES, filename="photo.jpg", content_type="image/jpeg")
+
+    with pytest.raises(FrozenInstanceError):
+        payload.data = b""  # type: ignore[misc]
+    assert payload.size == len(JPEG_BYTES)
+
+
+@pytest.mark.anyio
+async def test_create_and_complete_task(stub_service: _StubImageService) -> None:
+    manager = BackgroundTaskManager(image_service=stub_service, log_callback=logging.getLogger("test.background"))
+    payload = ImagePayload(data=JPEG_BYTES, filename="test.jpg", content_type="image/jpeg")
+    task_id = await manager.create_task({"prompt": "hello"}, payload)
+
+    status = await manager.wait_for_completion(task_id, timeout=1)
+
+    assert status["status"] == "completed"
+    assert status["result"]["size"] == len(JPEG_BYTES)
+    assert len(stub_service.calls) == 1
+
+
+@pytest.mark.anyio
+async def test_task_failure_is_reported() -> None:
+    manager = BackgroundTaskManager(
+        image_service=_FailingImageService(),
+        log_callback=logging.getLogger("test.background"),
+    )
+    payload = ImagePayload(data=JPEG_BYTES, filename="broken.jpg", content_type="image/jpeg")
+    task_id = await manager.create_task({}, payload)
+
+    status = await manager.wait_for_completion(task_id, timeout=1)
+    assert status["status"] == "failed"
+    assert "boom" in status["error"]
+
+
+@pytest.mark.anyio
+async def test_cancelled_task_wakes_waiters() -> None:
+    manager = BackgroundTaskManager(
+        image_service=_CancelledImageService(),
+        log_callback=logging.getLogger("test.background"),
+    )
+    payload = ImagePayload(data=JPEG_BYTES, filename="cancelled.jpg", content_type="image/jpeg")
+    task_id = await manager.create_task({}, payload)
+
+    status = await manager.wait_for_completion(task_id, timeout=1)
+    assert status["status"] == "failed"
+    assert status["error"] == "Task was cancelled"
+
+
+@pytest.mark.anyio
+async def test_normalised_content_type_used_for_upload(stub_client: _StubOpenAIClient) -> None:
+    payload = ImagePayload(
+        data=JPEG_BYTES,
+        filename="photo.jpg",
+        content_type="image/jpg",
+    )
+    service = OpenAIImageProcessingService(client=stub_client, log_callback=logging.getLogger("test.service"))
+
+    result = await service.generate({"prompt": "hi"}, payload)
+
+    assert result["file_id"] == "file_123"
+    assert len(stub_client.upload_requests) == 1
+    _, _, content_type = stub_client.upload_requests[0]
+    assert content_type == "image/jpeg"
+
+
+@pytest.mark.anyio
+async def test_generate_adds_reward_from_classification() -> None:
+    payload = ImagePayload(
+        data=JPEG_BYTES,
+        filename="scene.jpg",
+        content_type="image/jpeg",
+    )
+    response_payload = {
+        "output": [
+            {
+                "content": [
+                    {"type": "output_text", "text": "MOVABLE crate"},
+                ],
+            }
+        ]
+    }
+    client = _StubOpenAIClient(response_payload=response_payload)
+    metadata = {
+        "prompt": "classify",
+        "tileX": 6,
+        "tileY": 2,
+        "imageLabel": "crate",
+        "filename": "scene.jpg",
+    }
+    service = OpenAIImageProcessingService(client=client, log_callback=logging.getLogger("test.service"))
+
+    result = await service.generate(metadata, payload)
+
+    assert result["classification"] == "MOVABLE"
+    reward = result.get("reward")
+    assert reward is not None
+    assert reward["tileX"] == 6
+    assert reward["tileY"] == 2
+    assert reward["value"] == CLASSIFICATION_REWARD_VALUES["MOVABLE"]
+    attributes = reward.get("attributes", {})
+    assert attributes.get("classification") == "MOVABLE"
+    assert attributes.get("source") == CLASSIFICATION_ATTRIBUTE_SOURCE
+    assert attributes.get("label") == "crate"
+
+
+def test_extract_classification_handles_nested_payloads() -> None:
+    payload = {
+        "choices": [
+            {
+                "message": {
                     "content": [
-                        {"type": "output_text", "text": "MOVABLE crate"},
-                    ],
-                }
-            ]
-        }
-        client = _StubOpenAIClient(response_payload=response_payload)
-        metadata = {
-            "prompt": "classify",
-            "tileX": 6,
-            "tileY": 2,
-            "imageLabel": "crate",
-            "filename": "scene.jpg",
-        }
-        service = OpenAIImageProcessingService(client=client, log_callback=logging.getLogger("test.service"))
-
-        result = await service.generate(metadata, payload)
-
-        self.assertEqual(result["classification"], "MOVABLE")
-        reward = result.get("reward")
-        assert reward is not None
-        self.assertEqual(reward["tileX"], 6)
-        self.assertEqual(reward["tileY"], 2)
-        self.assertEqual(reward["value"], CLASSIFICATION_REWARD_VALUES["MOVABLE"])
-        attributes = reward.get("attributes", {})
-        self.assertEqual(attributes.get("classification"), "MOVABLE")
-        self.assertEqual(attributes.get("source"), CLASSIFICATION_ATTRIBUTE_SOURCE)
-        self.assertEqual(attributes.get("label"), "crate")
-
-    def test_extract_classification_handles_nested_payloads(self) -> None:
-        payload = {
-            "choices": [
-                {
-                    "message": {
-                        "content": [
-                            {
-                                "type": "output_text",
-                                "text": "This obstacle is dangerous for robots.",
-                            }
-                        ]
-                    }
+                        {
+                            "type": "output_text",
+                            "text": "This obstacle is dangerous for robots.",
+                        }
+                    ]
                 }
-            ]
-        }
+            }
+        ]
+    }
+
+    classification = OpenAIImageProcessingService._extract_classification(payload)
+
+    assert classification == "DANGEROUS"
+
+
+def test_extract_classification_prefers_output_keys() -> None:
+    payload = {"model": "movable-v1", "output": [{"text": "Immovable boulder."}]}
+
+    classification = OpenAIImageProcessingService._extract_classification(payload)
+
+    assert classification == "IMMOVABLE"
+
+
+@pytest.fixture
+def task_manager(stub_service: _StubImageService) -> BackgroundTaskManager:
+    return BackgroundTaskManager(image_service=stub_service, log_callback=logging.getLogger("test.api"))
+
+
+@pytest.fixture
+def api_client(app: FastAPI, client: TestClient, task_manager: BackgroundTaskManager) -> TestClient:
+    app.dependency_overrides[get_task_manager] = lambda: task_manager
+    return client
+
+
+def test_create_task_endpoint(api_client: TestClient, task_manager: BackgroundTaskManager) -> None:
+    body, headers = DESCRIBE_TASK_FORM
+    response = api_client.post("/tasks", content=body, headers=headers)
+
+    assert response.status_code == 202
+    task_id = response.json()["task_id"]
+
+    assert api_client.portal is not None
+    final_status = api_client.portal.call(task_manager.wait_for_completion, task_id, 1.0)
+
+    assert final_status["status"] == "completed"
+    assert final_status["result"]["filename"] == "image.jpg"
+
+    status_response = api_client.get(f"/tasks/{task_id}")
+    assert status_response.status_code == 200
+    assert status_response.json()["status"] == "completed"
+
+
+def test_invalid_metadata_returns_400(api_client: TestClient) -> None:
+    body, headers = INVALID_METADATA_FORM
+    response = api_client.post("/tasks", content=body, headers=headers)
+
+    assert response.status_code == 400
+
+
+def test_missing_file_returns_400(api_client: TestClient) -> None:
+    body, headers = EMPTY_FILE_FORM
+    response = api_client.post("/tasks", content=body, headers=headers)
+
+    assert response.status_code == 400
+
+
+def test_non_jpeg_upload_returns_400(api_client: TestClient) -> None:
+    body, headers = NON_JPEG_FORM
+    response = api_client.post("/tasks", content=body, headers=headers)
+
+    assert response.status_code == 400
+
 
-        classification = OpenAIImageProcessingService._extract_classification(payload)
-
-        self.assertEqual(classification, "DANGEROUS")
-
-
-class BackgroundTaskApiTests(unittest.TestCase):
-    def setUp(self) -> None:  # noqa: D401
-        service = _StubImageService()
-        self.manager = BackgroundTaskManager(image_service=service, log_callback=logging.getLogger("test.api"))
-        self.app = create_app()
-        self.app.dependency_overrides[get_task_manager] = lambda: self.manager
-        self.client = TestClient(self.app)
-
-    def tearDown(self) -> None:  # noqa: D401
-        self.client.close()
-        self.app.dependency_overrides.pop(get_task_manager, None)
-
-    def test_create_task_endpoint(self) -> None:
-        metadata = {"prompt": "describe"}
-        response = self.client.post(
-            "/tasks",
-            data={"metadata": json.dumps(metadata)},
-            files={"file": ("image.jpg", JPEG_BYTES, "image/jpeg")},
-        )
-
-        self.assertEqual(response.status_code, 202)
-        task_id = response.json()["task_id"]
-
-        final_status: dict[str, Any] | None = None
-        for _ in range(50):
-            status_response = self.client.get(f"/tasks/{task_id}")
-            self.assertEqual(status_response.status_code, 200)
-            payload = status_response.json()
-            if payload["status"] in {"completed", "failed"}:
-                final_status = payload
-                break
-            time.sleep(0.01)
-
-        self.assertIsNotNone(final_status)
-        assert final_status is not None
-        self.assertEqual(final_status["status"], "completed")
-        self.assertEqual(final_status["result"]["filename"], "image.jpg")
-
-    def test_invalid_metadata_returns_400(self) -> None:
-        response = self.client.post(
-            "/tasks",
-            data={"metadata": "not-json"},
-            files={"file": ("image.jpg", JPEG_BYTES, "image/jpeg")},
-        )
-
-        self.assertEqual(response.status_code, 400)
-
-    def test_missing_file_returns_400(self) -> None:
-        response = self.client.post(
-            "/tasks",
-            data={"metadata": json.dumps({})},
-            files={"file": ("image.jpg", b"", "image/jpeg")},
-        )
-
-        self.assertEqual(response.status_code, 400)
-
-    def test_non_jpeg_upload_returns_400(self) -> None:
-        response = self.client.post(
-            "/tasks",
-            data={"metadata": json.dumps({})},
-            files={"file": ("image.png", b"not-jpeg", "image/png")},
-        )
-
-        self.assertEqual(response.status_code, 400)
-
-    def test_unknown_task_returns_404(self) -> None:
-        response = self.client.get("/tasks/unknown")
-        self.assertEqual(response.status_code, 404)
+def test_unknown_task_returns_404(api_client: TestClient) -> None:
+    response = api_client.get("/tasks/unknown")
+    assert response.status_code == 404
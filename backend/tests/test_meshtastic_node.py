@@ -20,6 +20,13 @@ class MeshtasticNodeTests(unittest.TestCase):
         self.assertEqual(GridLocation(2, -1), moved.location)
         self.assertEqual(self.location, self.node.location)
 
+    def test_locations_are_immutable_and_interned(self) -> None:
+        moved = self.location.translated(1, 1)
+        self.assertIs(moved, GridLocation.interned(1, 1))
+        self.assertEqual({GridLocation(1, 1)}, {moved})
+        with self.assertRaises(AttributeError):
+            moved.x = 3  # type: ignore[misc]
+
     def test_battery_update_validates_range(self) -> None:
         updated = self.node.with_battery_level(50)
         self.assertAlmostEqual(50.0, updated.battery_level)
@@ -38,6 +38,11 @@ class SurroundingsTests(unittest.TestCase):
             },
         )
 
+    def test_from_mask_round_trips(self) -> None:
+        for mask in (0, 117, 127):
+            self.assertEqual(Surroundings.from_mask(mask).action_mask(), mask)
+        self.assertFalse(Surroundings.from_mask(117).can_move_backward)
+
 
 class NodeStateTests(unittest.TestCase):
     """Ensure node states produce deterministic integer encodings."""
@@ -89,6 +94,31 @@ class GridWorldEnvironmentTests(unittest.TestCase):
         self.assertEqual(reward, -1)
         self.assertFalse(done)
 
+    def test_step_honours_overridden_surroundings(self) -> None:
+        class BlockedEnvironment(GridWorldEnvironment):
+            def surroundings_for(self, location: GridLocation) -> Surroundings:
+                return Surroundings(False, False, False, False, True, True, True)
+
+        env = BlockedEnvironment(width=5, height=5)
+        node = MeshtasticNode(
+            identifier="node-blocked",
+            battery_level=60.0,
+            compute_efficiency_flops_per_milliamp=8.0,
+            location=GridLocation(2, 2),
+        )
+        _, updated_node, reward, _ = env.step(node, int(Action.MOVE_FORWARD))
+        self.assertEqual(updated_node.location, node.location)
+        self.assertEqual(reward, -1)
+
+    def test_encode_state_matches_node_state_and_rejects_border(self) -> None:
+        env = GridWorldEnvironment(width=5, height=5)
+        location = GridLocation(1, 3)
+        expected = NodeState(location, env.surroundings_for(location)).encode(5)
+        self.assertEqual(env.encode_state(location), expected)
+        self.assertEqual(env.encode_state(GridLocation(1, 3)), expected)
+        with self.assertRaises(ValueError):
+            env.encode_state(GridLocation(0, 3))
+
     def test_step_resumes_from_last_tracked_location(self) -> None:
         env = GridWorldEnvironment(width=5, height=5)
         node = MeshtasticNode(
@@ -121,6 +151,24 @@ class GridWorldEnvironmentTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             env.set_reward(GridLocation(0, 0), 5)
 
+    def test_reset_restores_rewards_and_forgets_tracked_nodes(self) -> None:
+        env = GridWorldEnvironment(width=5, height=5, rewards={(2, 2): 3})
+        node = MeshtasticNode(
+            identifier="node-1",
+            battery_level=80.0,
+            compute_efficiency_flops_per_milliamp=12.0,
+            location=GridLocation(2, 2),
+        )
+        env.step(node, int(Action.MOVE_FORWARD))
+        env.set_reward(GridLocation(2, 2), 0)
+        env.set_reward(GridLocation(3, 3), 4)
+
+        env.reset()
+
+        self.assertEqual(env.rewards(), {(2, 2): 3})
+        _, moved_node, _, _ = env.step(node, int(Action.MOVE_RIGHT))
+        self.assertEqual(moved_node.location, GridLocation(3, 2))
+
 
 class QLearningAgentTests(unittest.TestCase):
     """Confirm the Q-learning agent updates values correctly."""
@@ -149,6 +197,22 @@ class QLearningAgentTests(unittest.TestCase):
         )
         self.assertEqual(choice, int(Action.DO_WORK))
 
+    def test_action_values_exposes_read_only_row(self) -> None:
+        agent = QLearningAgent(learning_rate=0.5)
+        agent.learn(3, int(Action.DO_WORK), reward=4, next_state=3, next_available_actions=[])
+        values = agent.action_values(3)
+        self.assertEqual(dict(values), {int(Action.DO_WORK): 2.0})
+        self.assertEqual(dict(agent.action_values(99)), {})
+        with self.assertRaises(TypeError):
+            values[int(Action.STOP)] = 1.0  # type: ignore[index]
+
+    def test_choose_action_breaks_ties_by_order(self) -> None:
+        agent = QLearningAgent(exploration_rate=0.0)
+        state = 7
+        agent.learn(state, int(Action.STOP), reward=-1, next_state=state, next_available_actions=[])
+        choice = agent.choose_action(state, [int(Action.STOP), int(Action.MOVE_LEFT), int(Action.DO_WORK)])
+        self.assertEqual(choice, int(Action.MOVE_LEFT))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -4,8 +4,11 @@ from __future__ import annotations
 
 import json
 
+from dataclasses import dataclass
+from typing import Any
 from unittest.mock import patch
 
+from _spy import spy_on
 from simulation.logic import Action
 from simulation.logic import GridLocation
 from simulation.logic import QLearningAgent
@@ -13,6 +16,36 @@ from simulation.logic import Surroundings
 from simulation.runtime import MeshSimulation
 
 
+@dataclass
+class FixedRandom:
+    """Deterministic stand-in for ``random.Random`` that never idles or reorders."""
+
+    random_value: float = 0.99
+
+    def random(self) -> float:
+        return self.random_value
+
+    def uniform(self, start: float, end: float) -> float:  # noqa: ARG002
+        return start
+
+    def randrange(self, upper: int) -> int:  # noqa: ARG002
+        return 0
+
+    def shuffle(self, sequence: list[Any]) -> None:  # noqa: ARG002
+        return None
+
+
+def _occupancy(simulation: MeshSimulation, *coordinates: tuple[int, int]) -> bytearray:
+    """Build the occupancy bitmap ``_move_node`` expects with ``coordinates`` marked."""
+
+    grid = simulation.snapshot().grid
+    width = grid.width
+    occupied = bytearray(width * grid.height)
+    for x, y in coordinates:
+        occupied[y * width + x] = 1
+    return occupied
+
+
 def test_snapshot_serializes_to_json() -> None:
     simulation = MeshSimulation(
         width=5,
@@ -40,6 +73,17 @@ def test_snapshot_serializes_to_json() -> None:
     assert payload["alerts"] == {}
 
 
+def test_snapshot_json_matches_reflective_encoding() -> None:
+    simulation = MeshSimulation(width=6, height=6, cat_count=3, dog_count=1, random_seed=8, positive_reward_count=2)
+    for _ in range(3):
+        simulation.step()
+    simulation._set_alert("dog-1", "stuck")
+
+    snapshot = simulation.snapshot()
+
+    assert snapshot.to_json() == json.dumps(snapshot.to_dict(encode_json=False))
+
+
 def test_agents_remain_within_grid_bounds() -> None:
     simulation = MeshSimulation(width=4, height=4, cat_count=1, dog_count=1, random_seed=1)
 
@@ -54,6 +98,27 @@ def test_agents_remain_within_grid_bounds() -> None:
         assert 0 < dog.location.y < 3
 
 
+def test_agents_never_share_a_tile() -> None:
+    simulation = MeshSimulation(width=5, height=5, cat_count=6, dog_count=2, random_seed=29)
+
+    for _ in range(20):
+        snapshot = simulation.step()
+        positions = [(node.location.x, node.location.y) for node in (*snapshot.cats, *snapshot.dogs)]
+        assert len(positions) == len(set(positions))
+
+
+def test_log_callbacks_receive_unformatted_arguments() -> None:
+    calls: list[tuple[str, tuple[object, ...]]] = []
+
+    def record(message: str, *args: object) -> None:
+        calls.append((message, args))
+
+    simulation = MeshSimulation(width=5, height=5, cat_count=0, dog_count=0, log_callback=record)
+    simulation.step()
+
+    assert ("Simulation tick advanced to %s", (1,)) in calls
+
+
 def test_dog_without_model_eventually_moves() -> None:
     simulation = MeshSimulation(width=5, height=5, cat_count=0, dog_count=1, random_seed=7)
 
@@ -70,6 +135,18 @@ def test_dog_without_model_eventually_moves() -> None:
     assert moved, "Dog should explore the grid even without a trained model"
 
 
+def test_fixed_idle_probability_consumes_no_random_numbers() -> None:
+    simulation = MeshSimulation(width=5, height=5, cat_count=0, dog_count=2, random_seed=31)
+    state = simulation._rng.getstate()
+
+    assert simulation._draw_idle_rolls(2, 1.0) == [0.0, 0.0]
+    assert simulation._draw_idle_rolls(2, 0.0) == [0.0, 0.0]
+    assert simulation._rng.getstate() == state
+
+    assert len(simulation._draw_idle_rolls(2, 0.5)) == 2
+    assert simulation._rng.getstate() != state
+
+
 def test_snapshot_nodes_allow_location_updates() -> None:
     simulation = MeshSimulation(width=5, height=5, cat_count=1, dog_count=0, random_seed=19)
 
@@ -82,13 +159,13 @@ def test_snapshot_nodes_allow_location_updates() -> None:
 
     cat.location = target_location
 
-    with patch.object(simulation._environment, "step", wraps=simulation._environment.step) as step_spy:
+    with spy_on(simulation._environment, "step") as step_spy:
         simulation.step()
 
     cat_calls = [
-        call_args
-        for call_args in step_spy.call_args_list
-        if call_args.args[0].identifier == cat.identifier
+        call
+        for call in step_spy.calls
+        if call.args[0].identifier == cat.identifier
     ]
     assert cat_calls, "Expected environment step to process the updated node"
     moved_node = cat_calls[0].args[0]
@@ -107,6 +184,24 @@ def test_add_reward_tile_updates_environment() -> None:
 
     simulation.add_reward_tile(location, -2)
     assert simulation.environment.reward_at(location) == -2
+    assert [tile.value for tile in simulation.snapshot().rewards if tile.location == location] == [-2]
+
+
+def test_earlier_snapshots_are_unaffected_by_later_changes() -> None:
+    simulation = MeshSimulation(width=5, height=5, cat_count=1, dog_count=1, random_seed=37, reward_tiles=[(1, 1, 2)])
+
+    before = simulation.snapshot()
+    assert simulation.snapshot().rewards is before.rewards
+
+    simulation.add_reward_tile(GridLocation(3, 3), 6)
+    simulation._set_alert("dog-1", "stuck")
+    after = simulation.snapshot()
+
+    assert [tile.location for tile in before.rewards] == [GridLocation(1, 1)]
+    assert before.alerts == {}
+    assert len(after.rewards) == 2
+    assert after.alerts == {"dog-1": "stuck"}
+    assert simulation.step().cats is not before.cats
 
 
 def test_move_node_skips_occupied_tiles_without_side_effects() -> None:
@@ -116,24 +211,11 @@ def test_move_node_skips_occupied_tiles_without_side_effects() -> None:
     simulation._cats = [cat]
     simulation.environment._node_states[cat.identifier] = cat
 
-    occupied = {(2, 1)}
+    occupied = _occupancy(simulation, (2, 1))
 
-    class ControlledRandom:
-        def random(self) -> float:
-            return 0.9
+    simulation._rng = FixedRandom(random_value=0.9)
 
-        def shuffle(self, sequence) -> None:
-            return None
-
-        def uniform(self, start: float, end: float) -> float:
-            return start
-
-        def randrange(self, upper: int) -> int:
-            return 0
-
-    simulation._rng = ControlledRandom()
-
-    with patch.object(simulation._environment, "step", wraps=simulation._environment.step) as step_spy:
+    with spy_on(simulation._environment, "step") as step_spy:
         updated = simulation._move_node(
             cat,
             occupied,
@@ -166,24 +248,11 @@ def test_move_node_uses_registered_model_policy() -> None:
 
     simulation.set_models({cat.identifier: agent})
 
-    class PredictableRandom:
-        def random(self) -> float:
-            return 0.99
-
-        def uniform(self, start: float, end: float) -> float:
-            return start
-
-        def randrange(self, upper: int) -> int:
-            return 0
-
-        def shuffle(self, sequence) -> None:
-            return None
-
-    simulation._rng = PredictableRandom()
+    simulation._rng = FixedRandom()
 
     updated = simulation._move_node(
         cat,
-        set(),
+        _occupancy(simulation),
         agent_type="cat",
         idle_probability=0.0,
     )
@@ -201,36 +270,23 @@ def test_move_node_requests_model_when_untrained() -> None:
 
     messages = []
 
-    def capture(message: str) -> None:
-        messages.append(message)
+    def capture(message: str, *args: object) -> None:
+        messages.append(message % args)
 
     simulation._log = capture
 
-    class PredictableRandom:
-        def random(self) -> float:
-            return 0.99
-
-        def uniform(self, start: float, end: float) -> float:
-            return start
-
-        def randrange(self, upper: int) -> int:
-            return 0
-
-        def shuffle(self, sequence) -> None:
-            return None
+    simulation._rng = FixedRandom()
 
-    simulation._rng = PredictableRandom()
-
-    with patch.object(simulation._environment, "step", wraps=simulation._environment.step) as step_spy:
+    with spy_on(simulation._environment, "step") as step_spy:
         updated = simulation._move_node(
             cat,
-            set(),
+            _occupancy(simulation),
             agent_type="cat",
             idle_probability=0.0,
         )
 
     assert step_spy.call_count == 1
-    _, action = step_spy.call_args[0][0:2]
+    _, action = step_spy.calls[-1].args[0:2]
     assert action != int(Action.STOP)
     assert updated.location != cat.location
     assert any("lacks a trained model" in message for message in messages)
@@ -249,8 +305,8 @@ def test_cat_consumes_reward_and_broadcasts_update() -> None:
 
     messages: list[str] = []
 
-    def capture(message: str) -> None:
-        messages.append(message)
+    def capture(message: str, *args: object) -> None:
+        messages.append(message % args)
 
     simulation._log = capture
 
@@ -258,30 +314,17 @@ def test_cat_consumes_reward_and_broadcasts_update() -> None:
     simulation._cats = [cat]
     simulation.environment._node_states[cat.identifier] = cat
 
-    class DeterministicRandom:
-        def random(self) -> float:
-            return 0.99
-
-        def uniform(self, start: float, end: float) -> float:
-            return start
-
-        def randrange(self, upper: int) -> int:
-            return 0
-
-        def shuffle(self, sequence) -> None:
-            return None
-
-    simulation._rng = DeterministicRandom()
+    simulation._rng = FixedRandom()
 
     updated = simulation._move_node(
         cat,
-        set(),
+        _occupancy(simulation),
         agent_type="cat",
         idle_probability=0.0,
     )
 
     assert simulation.environment.reward_at(GridLocation(2, 2)) == 0
-    assert all(tile.location != GridLocation(2, 2) for tile in simulation._reward_tiles)
+    assert all(tile.location != GridLocation(2, 2) for tile in simulation.snapshot().rewards)
     assert any("broadcast state update" in message for message in messages)
     assert updated.location == cat.location
 
@@ -291,8 +334,8 @@ def test_dog_without_actions_sets_alert_status() -> None:
 
     messages: list[str] = []
 
-    def capture(message: str) -> None:
-        messages.append(message)
+    def capture(message: str, *args: object) -> None:
+        messages.append(message % args)
 
     simulation._log = capture
 
@@ -300,20 +343,7 @@ def test_dog_without_actions_sets_alert_status() -> None:
     simulation._dogs = [dog]
     simulation.environment._node_states[dog.identifier] = dog
 
-    class DeterministicRandom:
-        def random(self) -> float:
-            return 0.99
-
-        def uniform(self, start: float, end: float) -> float:
-            return start
-
-        def randrange(self, upper: int) -> int:
-            return 0
-
-        def shuffle(self, sequence) -> None:
-            return None
-
-    simulation._rng = DeterministicRandom()
+    simulation._rng = FixedRandom()
 
     no_actions = Surroundings(
         can_move_forward=False,
@@ -326,10 +356,10 @@ def test_dog_without_actions_sets_alert_status() -> None:
     )
 
     with patch.object(simulation._environment, "surroundings_for", return_value=no_actions):
-        with patch.object(simulation._environment, "step", wraps=simulation._environment.step) as step_spy:
+        with spy_on(simulation._environment, "step") as step_spy:
             updated = simulation._move_node(
                 dog,
-                set(),
+                _occupancy(simulation),
                 agent_type="dog",
                 idle_probability=0.0,
             )
@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
-"""Run the FastAPI backend under debugpy waiting for VS Code to attach."""
+"""Run the FastAPI backend with debugpy listening for VS Code to attach."""
 from __future__ import annotations
 
 import atexit
+import importlib.util
 import logging
 import os
 import signal
 import sys
+import threading
 from pathlib import Path
 
 try:
@@ -55,6 +57,23 @@ def _handle_signal(signum: int, frame) -> None:  # type: ignore[override]
     sys.exit(0)
 
 
+def _server_backends() -> tuple[str, str]:
+    """Pick uvloop and httptools when installed, else the pure-Python fallbacks.
+
+    ``fastapi[standard]`` ships both accelerators, but uvloop is unavailable on
+    Windows, so the choice is made here and logged rather than left implicit.
+    """
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+    return loop, http
+
+
+def _wait_for_debugger() -> None:
+    debugpy.wait_for_client()
+    _LOGGER.info("Debugger attached on %s:%s", LISTEN_HOST, LISTEN_PORT)
+
+
 def main() -> None:
     _configure_logging()
     print("Starting backend debug server", flush=True)
@@ -64,15 +83,28 @@ def main() -> None:
     for sig in (signal.SIGINT, signal.SIGTERM):
         signal.signal(sig, _handle_signal)
 
+    # Uvicorn runs in this process, so debugpy does not need to follow subprocesses.
+    debugpy.configure(subProcess=False)
     debugpy.listen((LISTEN_HOST, LISTEN_PORT))
+    # The VS Code task attaches once this line appears, so it is printed only
+    # after ``listen`` has opened the port.
     message = f"Waiting for debugger to attach on {LISTEN_HOST}:{LISTEN_PORT}"
     print(message, flush=True)
     _LOGGER.info("Debugpy listening on %s:%s", LISTEN_HOST, LISTEN_PORT)
-    debugpy.wait_for_client()
-    _LOGGER.info("Debugger attached; starting Uvicorn on %s:%s", UVICORN_HOST, UVICORN_PORT)
+    threading.Thread(target=_wait_for_debugger, name="debugpy-attach", daemon=True).start()
+    loop, http = _server_backends()
+    _LOGGER.info("Starting Uvicorn on %s:%s (loop=%s, http=%s)", UVICORN_HOST, UVICORN_PORT, loop, http)
 
     try:
-        uvicorn.run(UVICORN_APP, host=UVICORN_HOST, port=UVICORN_PORT, log_level="info")
+        uvicorn.run(
+            UVICORN_APP,
+            host=UVICORN_HOST,
+            port=UVICORN_PORT,
+            log_level="info",
+            reload=False,
+            loop=loop,
+            http=http,
+        )
     except KeyboardInterrupt:
         _LOGGER.info("Keyboard interrupt received, shutting down backend debug server.")
     finally:
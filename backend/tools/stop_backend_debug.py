@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 import os
+import select
 import signal
 import time
 from pathlib import Path
 
 PID_FILE = Path(__file__).resolve().parents[2] / ".vscode" / "backend-debug.pid"
+STOP_TIMEOUT_SECONDS = 1.0
+# Escalating poll delays: quick exits are noticed within a few milliseconds
+# while slow shutdowns settle into 100ms checks.
+POLL_BACKOFF_SECONDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1)
 
 
 def _read_pid() -> int | None:
@@ -36,21 +41,90 @@ def _terminate(pid: int) -> None:
         return
 
 
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _poll_for_exit(pid: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while True:
+        if not _is_running(pid):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        delay = POLL_BACKOFF_SECONDS[min(attempt, len(POLL_BACKOFF_SECONDS) - 1)]
+        time.sleep(min(delay, remaining))
+        attempt += 1
+
+
+def _stop_process(pid: int, timeout: float) -> bool:
+    """Terminate ``pid`` and wait up to ``timeout`` seconds for it to exit.
+
+    The exit watch is registered before the signal is sent so a fast shutdown
+    cannot be missed. Linux uses a pidfd and macOS/BSD a kqueue process
+    filter, both of which wake as soon as the process exits. Other platforms
+    fall back to polling.
+    """
+
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is not None:
+        try:
+            pidfd = pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            pass
+        else:
+            try:
+                _terminate(pid)
+                readable, _, _ = select.select([pidfd], [], [], timeout)
+                return bool(readable)
+            finally:
+                os.close(pidfd)
+
+    if hasattr(select, "kqueue"):
+        queue = select.kqueue()
+        try:
+            exit_filter = select.kevent(
+                pid,
+                filter=select.KQ_FILTER_PROC,
+                flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                fflags=select.KQ_NOTE_EXIT,
+            )
+            try:
+                queue.control([exit_filter], 0)
+            except ProcessLookupError:
+                return True
+            except OSError:
+                pass
+            else:
+                _terminate(pid)
+                return bool(queue.control(None, 1, timeout))
+        finally:
+            queue.close()
+
+    _terminate(pid)
+    return _poll_for_exit(pid, timeout)
+
+
 def main() -> None:
     pid = _read_pid()
     if pid is None:
         print("No backend debug server is currently running.")
         return
 
-    _terminate(pid)
-    for _ in range(10):
-        time.sleep(0.1)
-        try:
-            os.kill(pid, 0)
-        except ProcessLookupError:
-            _remove_pid_file()
-            print("Backend debug server stopped.")
-            return
+    if _stop_process(pid, STOP_TIMEOUT_SECONDS):
+        _remove_pid_file()
+        print("Backend debug server stopped.")
+        return
     _remove_pid_file()
     print("Timed out waiting for backend debug server to stop. Process id:", pid)
 
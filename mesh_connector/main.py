@@ -5,21 +5,54 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import mmap
+import os
 import random
 import sys
-import time
-from contextlib import ExitStack
+from collections.abc import MutableSequence
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from importlib.util import find_spec
+from operator import itemgetter
 from pathlib import Path
-from typing import Iterable, Iterator, List, Optional, Tuple
-
-from google.protobuf.json_format import MessageToDict
-from bleak import BleakClient
-from meshtastic.ble_interface import BLEClient as MeshtasticBLEClient
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+# Select the upb protobuf runtime before anything imports protobuf; it is far
+# faster than the pure Python implementation and falls back with a warning
+# when the installed wheel does not ship it.
+os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "upb")
+
+from google.protobuf import text_format
+from google.protobuf.internal import api_implementation
+from google.protobuf.descriptor import FieldDescriptor
+from google.protobuf.message import Message
+from bleak import AdvertisementData, BleakClient, BleakScanner
 from meshtastic.ble_interface import BLEDevice, BLEInterface
+from meshtastic.protobuf import mesh_pb2
+
+try:  # optional accelerator; the stdlib event loop is used when it is absent
+    import uvloop
+except ImportError:  # pragma: no cover - depends on optional dependency
+    uvloop = None  # type: ignore[assignment]
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
-if str(REPO_ROOT) not in sys.path:
-    sys.path.insert(0, str(REPO_ROOT))
+# Only extend the import path when the repository packages are not already
+# importable (e.g. when this file is run directly as a script), so every later
+# import does not have to probe an extra directory.
+if find_spec("backend") is None or find_spec("mesh_connector") is None:
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
 
 try:  # noqa: WPS229 - import guard keeps optional dependency optional at runtime
     from backend.simulation.logic import (  # type: ignore
@@ -34,7 +67,22 @@ except ImportError as exc:  # pragma: no cover - exercised when backend package
 else:
     SIMULATION_IMPORT_ERROR = None
 
-from mesh_connector.protos import AddressableMeshData, StateUpdate
+if Action is not None:
+    _action_members = {int(action): action.name for action in Action}
+    _ACTION_NAMES: Optional[Tuple[str, ...]] = tuple(
+        _action_members.get(value, str(value)) for value in range(max(_action_members) + 1)
+    )
+    del _action_members
+    _STOP_ACTION_BIT = 1 << int(Action.STOP)
+    # Set bits of every possible action mask, in ascending action order.
+    _ACTIONS_BY_MASK: Tuple[Tuple[int, ...], ...] = tuple(
+        tuple(value for value in range(len(_ACTION_NAMES)) if mask >> value & 1)
+        for mask in range(1 << len(_ACTION_NAMES))
+    )
+else:  # pragma: no cover - exercised when backend package is absent
+    _ACTION_NAMES = None
+
+from mesh_connector.protos import AddressableMeshData
 
 LOGGER_NAME = "mesh_connector.main"
 DEFAULT_LOG_LEVEL = "INFO"
@@ -43,10 +91,16 @@ LOG_LEVELS = ["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"]
 OTA_SERVICE_UUID = "4FAFC201-1FB5-459E-8FCC-C5C9C331914B"
 OTA_DATA_CHARACTERISTIC_UUID = "62EC0272-3EC5-11EB-B378-0242AC130005"
 OTA_ACK_CHARACTERISTIC_UUID = "62EC0272-3EC5-11EB-B378-0242AC130003"
+# Bleak reports characteristic UUIDs in lower case.
+_OTA_DATA_UUID_LC = OTA_DATA_CHARACTERISTIC_UUID.lower()
+_OTA_ACK_UUID_LC = OTA_ACK_CHARACTERISTIC_UUID.lower()
 OTA_CHUNK_SIZE = 400
+_BLE_ADDRESS_SEPARATORS = str.maketrans("", "", "-_:")
 OTA_SCAN_TIMEOUT_SECONDS = 60.0
 OTA_DISCOVERY_WINDOW_SECONDS = 6.0
 OTA_ACK_TIMEOUT_SECONDS = 10.0
+OTA_SIZE_SETTLE_SECONDS = 0.5
+OTA_FINALISE_SECONDS = 5.0
 
 PROTOCOL_VERSION = 1
 APPLICATION_ID = 0x434F4D50  # ASCII 'COMP'
@@ -55,6 +109,31 @@ BROADCAST_ADDRESS = 0x000000
 DEFAULT_MESH_DEVICE_COUNT = 30
 SIMULATION_INTERVAL_SECONDS = 2.0
 DEFAULT_MAX_UPDATES = 5
+# Meshtastic sends each Data payload as a single LoRa frame and rejects
+# anything larger instead of segmenting it.
+MESH_MAX_PAYLOAD_BYTES = mesh_pb2.Constants.DATA_PAYLOAD_LEN
+MESH_DATA_RATE_BPS = 9600.0
+MESH_TX_CURRENT_MA = 120.0
+MESH_RX_CURRENT_MA = 45.0
+_MILLIAMPS_TO_AMP_HOURS_PER_SECOND = 1.0 / 1000.0 / 3600.0
+_SIMULATION_REWARDS = {
+    (3, 3): 8,
+    (8, 8): 5,
+    (5, 7): -3,
+}
+
+_T = TypeVar("_T")
+
+
+class EnergyStats(NamedTuple):
+    """Estimated airtime and charge used to broadcast one payload across the mesh."""
+
+    bits_sent: float
+    tx_time_seconds: float
+    rx_time_seconds: float
+    tx_amp_hours: float
+    rx_amp_hours: float
+    total_amp_hours: float
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -93,6 +172,15 @@ def parse_arguments() -> argparse.Namespace:
             "When omitted the utility will not attempt an OTA firmware update."
         ),
     )
+    parser.add_argument(
+        "--simulation",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Stream simulated reinforcement learning state updates after connecting "
+            "to --node-id. Use --no-simulation to only report device information."
+        ),
+    )
     return parser.parse_args()
 
 
@@ -107,12 +195,40 @@ def configure_logging(log_level: str) -> logging.Logger:
 
 def log_device_metadata(logger: logging.Logger, metadata: Iterable[tuple[str, object]]) -> None:
     """Write BLE metadata details to the logger."""
-    has_metadata = False
-    for key, value in metadata:
-        has_metadata = True
-        logger.info("    %s: %s", key, value)
-    if not has_metadata:
-        logger.info("    No additional BLE metadata available.")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    lines = _format_log_fields(metadata)
+    logger.info("%s", lines or "    No additional BLE metadata available.")
+
+
+def _format_log_fields(fields: Iterable[tuple[str, object]]) -> str:
+    """Render ``fields`` as indented ``key: value`` lines for a single log record."""
+    return "\n".join(f"    {key}: {value}" for key, value in fields)
+
+
+def _message_log_fields(message: Message) -> List[tuple[str, object]]:
+    """Return the populated fields of ``message`` as name-sorted ``(name, value)`` pairs."""
+    fields: List[tuple[str, object]] = []
+    for descriptor, value in message.ListFields():
+        if isinstance(value, MutableSequence):
+            value = [_field_log_value(descriptor, item) for item in value]
+        else:
+            value = _field_log_value(descriptor, value)
+        fields.append((descriptor.name, value))
+    fields.sort(key=itemgetter(0))
+    return fields
+
+
+def _field_log_value(descriptor: FieldDescriptor, value: object) -> object:
+    """Convert a single protobuf field value into a readable log value."""
+    if descriptor.type == FieldDescriptor.TYPE_ENUM:
+        enum_value = descriptor.enum_type.values_by_number.get(value)
+        return enum_value.name if enum_value is not None else value
+    if descriptor.type == FieldDescriptor.TYPE_MESSAGE:
+        return text_format.MessageToString(value, as_one_line=True)
+    if descriptor.type == FieldDescriptor.TYPE_BYTES:
+        return value.hex()
+    return value
 
 
 def list_available_devices(logger: logging.Logger) -> None:
@@ -124,10 +240,15 @@ def list_available_devices(logger: logging.Logger) -> None:
         return
 
     logger.info("Found %s device(s).", len(devices))
+    if not logger.isEnabledFor(logging.INFO):
+        return
     for index, device in enumerate(devices, start=1):
-        logger.info("Device %s:", index)
-        logger.info("    Name: %s", device.name or "<unknown>")
-        logger.info("    Address: %s", device.address)
+        logger.info(
+            "Device %s:\n    Name: %s\n    Address: %s",
+            index,
+            device.name or "<unknown>",
+            device.address,
+        )
         device_metadata = sorted((device.metadata or {}).items())
         log_device_metadata(logger, device_metadata)
 
@@ -137,6 +258,7 @@ def inspect_device(
     node_identifier: str,
     *,
     firmware_path: Optional[Path] = None,
+    simulate: bool = True,
 ) -> None:
     """Connect to a specific Meshtastic node and log device metadata."""
     logger.info("Connecting to Meshtastic device '%s' over BLE...", node_identifier)
@@ -146,29 +268,28 @@ def inspect_device(
 
         logger.info("Connected to device '%s'.", node_identifier)
 
+        info_enabled = logger.isEnabledFor(logging.INFO)
         if interface.myInfo is not None:
-            info_dict = MessageToDict(
-                interface.myInfo, preserving_proto_field_name=True
-            )
-            for key, value in sorted(info_dict.items()):
-                logger.info("Device info %s: %s", key, value)
+            if info_enabled:
+                info_fields = _message_log_fields(interface.myInfo)
+                if info_fields:
+                    logger.info("Device info:\n%s", _format_log_fields(info_fields))
         else:
             logger.info("Device information has not been received yet.")
 
         logger.info("Requesting device metadata...")
         interface.localNode.getMetadata()
         if interface.metadata is not None:
-            metadata_dict = MessageToDict(
-                interface.metadata, preserving_proto_field_name=True
-            )
-            for key, value in sorted(metadata_dict.items()):
-                logger.info("Metadata %s: %s", key, value)
+            if info_enabled:
+                metadata_fields = _message_log_fields(interface.metadata)
+                if metadata_fields:
+                    logger.info("Metadata:\n%s", _format_log_fields(metadata_fields))
         else:
             logger.info("No metadata was returned by the device.")
 
         if firmware_path is not None:
             push_firmware_update(interface, logger, firmware_path)
-        else:
+        elif simulate:
             stream_state_updates(interface, logger)
 
 
@@ -182,45 +303,100 @@ def stream_state_updates(
 ) -> None:
     """Generate reinforcement learning updates and transmit them across the mesh."""
 
+    try:
+        _run_coroutine(
+            stream_state_updates_async(
+                interface,
+                logger,
+                device_count=device_count,
+                interval_seconds=interval_seconds,
+                max_updates=max_updates,
+            )
+        )
+    except KeyboardInterrupt:  # pragma: no cover - manual interruption
+        pass  # reported by the coroutine when it was cancelled
+
+
+async def stream_state_updates_async(
+    interface: BLEInterface,
+    logger: logging.Logger,
+    *,
+    device_count: int = DEFAULT_MESH_DEVICE_COUNT,
+    interval_seconds: float = SIMULATION_INTERVAL_SECONDS,
+    max_updates: Optional[int] = DEFAULT_MAX_UPDATES,
+) -> None:
+    """Stream simulated updates while the next transition is computed in the background."""
+
     if SIMULATION_IMPORT_ERROR is not None or GridWorldEnvironment is None:
         logger.error(
             "Simulation logic could not be loaded: %s", SIMULATION_IMPORT_ERROR
         )
         return
 
+    send_callable = getattr(interface, "sendData", None) or getattr(
+        getattr(interface, "localNode", None), "sendData", None
+    )
+    if send_callable is None:  # pragma: no cover - depends on meshtastic runtime availability
+        logger.error("Meshtastic interface does not expose a sendData method")
+        return
+
     logger.info(
         "Starting simulated reinforcement learning updates for %s mesh devices.",
         device_count,
     )
     total_bytes = 0
     updates_sent = 0
-    generator = _generate_state_updates(logger)
+    transitions = _TransitionStream(logger)
+    # The addressing fields never change between updates, so one envelope is
+    # reused and only the sequence number and payload are replaced each time.
+    envelope = AddressableMeshData(
+        protocol_version=PROTOCOL_VERSION,
+        application_id=APPLICATION_ID,
+        source_address=SOURCE_ADDRESS,
+        destination_address=BROADCAST_ADDRESS,
+    )
+    state_update = envelope.state_update
+    serialize_envelope = envelope.SerializeToString
+    queue: asyncio.Queue[Optional[_Transition]] = asyncio.Queue(maxsize=1)
+    estimate_mesh_energy = _make_mesh_energy_estimator(device_count)
+    info_enabled = logger.isEnabledFor(logging.INFO)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    # Bound once so the send loop does not repeat the attribute lookups.
+    log_info = logger.info
+    log_debug = logger.debug
+    run_in_thread = asyncio.to_thread
+    sleep = asyncio.sleep
+    clock = asyncio.get_running_loop().time
+    producer = asyncio.create_task(_produce_state_updates(transitions, queue))
 
     try:
-        for sequence_id, update in enumerate(generator, start=1):
-            if max_updates is not None and sequence_id > max_updates:
+        sequence_id = 0
+        # Pace sends against a fixed schedule so serialisation and BLE write
+        # latency do not stretch the interval between updates.
+        deadline = clock()
+        while max_updates is None or sequence_id < max_updates:
+            transition = await queue.get()
+            if transition is None:
+                # Re-raise anything that stopped the simulation early.
+                await producer
                 break
-            state_update, action_value, reward, done = update
-            envelope = AddressableMeshData(
-                protocol_version=PROTOCOL_VERSION,
-                application_id=APPLICATION_ID,
-                source_address=SOURCE_ADDRESS,
-                destination_address=BROADCAST_ADDRESS,
-                sequence_id=sequence_id,
-                state_update=state_update,
-            )
-            payload = envelope.SerializeToString()
-
-            if hasattr(interface, "sendData"):
-                send_callable = interface.sendData
-            elif hasattr(interface, "localNode") and hasattr(interface.localNode, "sendData"):
-                send_callable = interface.localNode.sendData
-            else:  # pragma: no cover - depends on meshtastic runtime availability
-                logger.error("Meshtastic interface does not expose a sendData method")
+            sequence_id += 1
+            envelope.sequence_id = sequence_id
+            state_update.packed_transition = transition.packed_transition
+            state_update.prior_state_id = transition.prior_state_id
+            state_update.next_state_id = transition.next_state_id
+            payload = serialize_envelope()
+            if len(payload) > MESH_MAX_PAYLOAD_BYTES:
+                logger.error(
+                    "State update %s is %s bytes; Meshtastic payloads are limited to %s",
+                    sequence_id,
+                    len(payload),
+                    MESH_MAX_PAYLOAD_BYTES,
+                )
                 return
 
             try:
-                send_callable(payload)
+                await run_in_thread(send_callable, payload)
             except Exception as exc:  # pragma: no cover - depends on runtime transport
                 logger.error("Failed to send state update %s: %s", sequence_id, exc)
                 return
@@ -228,33 +404,64 @@ def stream_state_updates(
             bytes_sent = len(payload)
             total_bytes += bytes_sent
             updates_sent = sequence_id
-            action_name = _resolve_action_name(action_value)
-            logger.info(
-                "Sent state update seq=%s action=%s reward=%s done=%s (%s bytes)",
-                sequence_id,
-                action_name,
-                reward,
-                done,
-                bytes_sent,
-            )
-            stats = _calculate_mesh_energy(bytes_sent, device_count)
-            logger.info(
-                "Estimated mesh energy for %s devices: tx=%.6fAh rx=%.6fAh total=%.6fAh",
-                device_count,
-                stats["tx_amp_hours"],
-                stats["rx_amp_hours"],
-                stats["total_amp_hours"],
-            )
-            logger.debug("Transmission statistics: %s", stats)
-            time.sleep(interval_seconds)
-    except KeyboardInterrupt:  # pragma: no cover - manual interruption
+            # The action name and energy estimate only feed the log output.
+            if info_enabled:
+                stats = estimate_mesh_energy(bytes_sent)
+                log_info(
+                    "Sent state update seq=%s action=%s reward=%s done=%s (%s bytes); "
+                    "estimated mesh energy for %s devices: "
+                    "tx=%.6fAh rx=%.6fAh total=%.6fAh",
+                    sequence_id,
+                    _resolve_action_name(transition.action_value),
+                    transition.reward,
+                    transition.done,
+                    bytes_sent,
+                    device_count,
+                    stats.tx_amp_hours,
+                    stats.rx_amp_hours,
+                    stats.total_amp_hours,
+                )
+                if debug_enabled:
+                    log_debug("Transmission statistics: %s", stats)
+            deadline += interval_seconds
+            remaining = deadline - clock()
+            if remaining > 0:
+                await sleep(remaining)
+            else:
+                # Running behind: restart the schedule instead of bursting.
+                deadline -= remaining
+    except asyncio.CancelledError:  # pragma: no cover - manual interruption
         logger.info("State update streaming interrupted by user")
+        raise
+    finally:
+        producer.cancel()
+        logger.info(
+            "Completed transmission of %s simulated state updates (%s bytes total).",
+            updates_sent,
+            total_bytes,
+        )
 
-    logger.info(
-        "Completed transmission of %s simulated state updates (%s bytes total).",
-        updates_sent,
-        total_bytes,
-    )
+
+async def _produce_state_updates(
+    transitions: Iterator[_Transition],
+    queue: asyncio.Queue[Optional[_Transition]],
+) -> None:
+    """Step the simulation off the event loop so it overlaps with sending.
+
+    ``None`` is always queued when the producer stops, including when stepping
+    the simulation raises, so the consumer is never left waiting on the queue.
+    """
+
+    try:
+        while True:
+            transition = await asyncio.to_thread(next, transitions, None)
+            if transition is None:
+                return
+            await queue.put(transition)
+    finally:
+        # Once cancelled, the consumer has already stopped reading.
+        if not asyncio.current_task().cancelling():
+            await queue.put(None)
 
 
 def push_firmware_update(
@@ -274,8 +481,8 @@ def push_firmware_update(
         logger.error("Firmware path '%s' does not exist or is not a file.", firmware_path)
         return
 
-    firmware_bytes = firmware_path.read_bytes()
-    if not firmware_bytes:
+    firmware_size = firmware_path.stat().st_size
+    if not firmware_size:
         logger.error("Firmware file '%s' is empty; aborting OTA update.", firmware_path)
         return
 
@@ -291,7 +498,7 @@ def push_firmware_update(
 
     logger.info(
         "Preparing to transfer %s bytes of firmware from '%s' to device %s.",
-        len(firmware_bytes),
+        firmware_size,
         firmware_path,
         device_address,
     )
@@ -308,7 +515,7 @@ def push_firmware_update(
     except Exception as exc:  # pragma: no cover - depends on runtime BLE stack
         logger.warning("Error while closing BLE interface prior to OTA: %s", exc)
 
-    ota_device = _discover_ota_peripheral(device_address, logger)
+    ota_device = _run_coroutine(_discover_ota_peripheral(device_address, logger))
     if ota_device is None:
         logger.error(
             "Timed out waiting for OTA loader to advertise for device %s.",
@@ -317,7 +524,8 @@ def push_firmware_update(
         return
 
     try:
-        _transfer_firmware(ota_device.address, firmware_bytes, logger)
+        with _map_firmware(firmware_path) as firmware:
+            _transfer_firmware(ota_device.address, firmware, logger)
     except Exception as exc:  # pragma: no cover - depends on runtime BLE stack
         logger.error("Firmware transfer failed: %s", exc)
         return
@@ -327,101 +535,164 @@ def push_firmware_update(
     )
 
 
-def _discover_ota_peripheral(
+async def _discover_ota_peripheral(
     original_address: str,
     logger: logging.Logger,
 ) -> Optional[BLEDevice]:
     """Locate the OTA loader peripheral that advertises the firmware service."""
 
     target_address = _normalize_ble_address(original_address)
-    deadline = time.monotonic() + OTA_SCAN_TIMEOUT_SECONDS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + OTA_SCAN_TIMEOUT_SECONDS
+    loader_seen = asyncio.Event()
+    target_seen = asyncio.Event()
+    located: Optional[BLEDevice] = None
     discovered: Optional[BLEDevice] = None
 
-    while time.monotonic() < deadline:
+    def _on_advertisement(device: BLEDevice, _adv: AdvertisementData) -> None:
+        nonlocal located, discovered
+        if located is not None:
+            return
+        if target_address and _normalize_ble_address(device.address or "") == target_address:
+            located = device
+            target_seen.set()
+        elif discovered is None:
+            discovered = device
+        loader_seen.set()
+
+    while located is None and loop.time() < deadline:
         try:
-            with MeshtasticBLEClient() as client:
-                response = client.discover(
-                    timeout=OTA_DISCOVERY_WINDOW_SECONDS,
-                    return_adv=True,
+            async with asyncio.timeout_at(deadline) as scan_timeout:
+                async with BleakScanner(
+                    detection_callback=_on_advertisement,
                     service_uuids=[OTA_SERVICE_UUID],
-                )
+                    scanning_mode="active",
+                ):
+                    await loader_seen.wait()
+                    if located is None:
+                        # Give the original device one more discovery window to
+                        # advertise before settling for another loader.
+                        scan_timeout.reschedule(
+                            min(deadline, loop.time() + OTA_DISCOVERY_WINDOW_SECONDS)
+                        )
+                        await target_seen.wait()
+        except TimeoutError:
+            break
         except Exception as exc:  # pragma: no cover - depends on OS BLE stack
             logger.warning("BLE scan for OTA loader failed: %s", exc)
-            time.sleep(2.0)
-            continue
+            await asyncio.sleep(2.0)
 
-        for device, _adv in response.values():
-            normalized = _normalize_ble_address(device.address or "")
-            if target_address and normalized == target_address:
-                logger.info(
-                    "Located OTA loader for device %s at address %s.",
-                    original_address,
-                    device.address,
-                )
-                return device
-            if discovered is None:
-                discovered = device
+    if located is not None:
+        logger.info(
+            "Located OTA loader for device %s at address %s.",
+            original_address,
+            located.address,
+        )
+        return located
+    if discovered is not None:
+        logger.info(
+            "Using OTA loader at address %s (original device address %s).",
+            discovered.address,
+            original_address,
+        )
+    return discovered
 
-        if discovered is not None:
-            logger.info(
-                "Using OTA loader at address %s (original device address %s).",
-                discovered.address,
-                original_address,
-            )
-            return discovered
 
-        logger.debug("OTA loader not yet advertising; retrying scan.")
-        time.sleep(2.0)
+@contextmanager
+def _map_firmware(firmware_path: Path) -> Iterator[mmap.mmap]:
+    """Map the firmware image read-only so it is paged in as chunks are sent.
 
-    return None
+    Slicing the map copies each chunk into ``bytes``. A ``memoryview`` slice
+    would pin the map, so an exception raised mid-transfer could make closing
+    it fail with ``BufferError`` and hide the original error.
+    """
 
+    with firmware_path.open("rb") as handle:
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
 
-def _transfer_firmware(address: str, firmware_bytes: bytes, logger: logging.Logger) -> None:
+
+def _transfer_firmware(
+    address: str,
+    firmware: bytes | mmap.mmap,
+    logger: logging.Logger,
+) -> None:
     """Send the firmware bytes to the OTA loader over BLE."""
 
     async def _async_transfer() -> None:
-        ack_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        # Acknowledgements carry no chunk index, so only one write is awaited at
+        # a time and notifications that arrive while nothing is outstanding
+        # (duplicates or strays) are ignored instead of crediting a later write.
+        waiter: Optional[asyncio.Future[None]] = None
+        header_ack_overdue = False
+        disconnected = asyncio.Event()
+
+        def _acknowledge(acknowledged: asyncio.Future[None]) -> None:
+            if not acknowledged.done():
+                acknowledged.set_result(None)
 
         def _notification_handler(_handle: int, data: bytes) -> None:
+            nonlocal header_ack_overdue
+            if waiter is None or waiter.done():
+                logger.debug("Ignoring unexpected OTA notification: %s", data.hex())
+                return
             logger.debug("Received OTA acknowledgement: %s", data.hex())
-            ack_event.set()
+            if header_ack_overdue:
+                # The first notification after a timed-out size header may be
+                # that header's late ACK, so only credit it to the chunk if
+                # nothing else arrives within the settle bound.
+                header_ack_overdue = False
+                loop.call_later(OTA_SIZE_SETTLE_SECONDS, _acknowledge, waiter)
+                return
+            waiter.set_result(None)
 
-        async with BleakClient(address) as client:
+        async with BleakClient(
+            address, disconnected_callback=lambda _client: disconnected.set()
+        ) as client:
             services = await client.get_services()
-            available_characteristics = {
-                characteristic.uuid.lower()
+            has_data_characteristic = any(
+                characteristic.uuid.lower() == _OTA_DATA_UUID_LC
                 for service in services
                 for characteristic in service.characteristics
-            }
+            )
 
-            if OTA_DATA_CHARACTERISTIC_UUID.lower() not in available_characteristics:
+            if not has_data_characteristic:
                 raise RuntimeError(
                     "OTA data characteristic is not exposed by the connected peripheral."
                 )
 
-            await client.start_notify(OTA_ACK_CHARACTERISTIC_UUID, _notification_handler)
-            await client.write_gatt_char(
-                OTA_DATA_CHARACTERISTIC_UUID,
-                f"OTA_SIZE:{len(firmware_bytes)}".encode("ascii"),
+            async def _write_and_wait(data: bytes, *, response: bool, timeout: float) -> bool:
+                nonlocal waiter
+                # Expect the acknowledgement before writing so one that arrives
+                # while the write call is still in progress is not missed.
+                acknowledged = waiter = loop.create_future()
+                try:
+                    await client.write_gatt_char(
+                        OTA_DATA_CHARACTERISTIC_UUID, data, response=response
+                    )
+                    done, _ = await asyncio.wait((acknowledged,), timeout=timeout)
+                finally:
+                    acknowledged.cancel()
+                return bool(done)
+
+            await client.start_notify(_OTA_ACK_UUID_LC, _notification_handler)
+            # Not every loader acknowledges the size header, so wait no longer
+            # than the original settle delay for it.
+            header_ack_overdue = not await _write_and_wait(
+                f"OTA_SIZE:{len(firmware)}".encode("ascii"),
                 response=True,
+                timeout=OTA_SIZE_SETTLE_SECONDS,
             )
 
-            await asyncio.sleep(0.5)
-
-            total = len(firmware_bytes)
+            total = len(firmware)
             sent = 0
 
             for chunk_index, start in enumerate(range(0, total, OTA_CHUNK_SIZE), start=1):
-                chunk = firmware_bytes[start : start + OTA_CHUNK_SIZE]
-                ack_event.clear()
-                await client.write_gatt_char(
-                    OTA_DATA_CHARACTERISTIC_UUID,
-                    chunk,
-                    response=False,
-                )
-                try:
-                    await asyncio.wait_for(ack_event.wait(), timeout=OTA_ACK_TIMEOUT_SECONDS)
-                except asyncio.TimeoutError:
+                chunk = firmware[start : start + OTA_CHUNK_SIZE]
+                if not await _write_and_wait(
+                    chunk, response=False, timeout=OTA_ACK_TIMEOUT_SECONDS
+                ):
                     logger.warning(
                         "Did not receive OTA acknowledgement after chunk %s; continuing.",
                         chunk_index,
@@ -436,82 +707,109 @@ def _transfer_firmware(address: str, firmware_bytes: bytes, logger: logging.Logg
                 )
 
             logger.info("All firmware chunks transmitted; waiting for device to finalise flashing.")
-            await asyncio.sleep(5.0)
+            # The loader reboots once flashing completes, which drops the link. A
+            # notification is no signal here as it may just be a duplicate ACK.
+            try:
+                await asyncio.wait_for(disconnected.wait(), timeout=OTA_FINALISE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    _run_coroutine(_async_transfer())
 
-    asyncio.run(_async_transfer())
 
+def _run_coroutine(coroutine: Coroutine[Any, Any, _T]) -> _T:
+    """Run ``coroutine`` to completion, on uvloop when it is installed."""
 
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coroutine)
+
+
+@lru_cache(maxsize=512)
 def _normalize_ble_address(address: str) -> str:
     """Return a normalised BLE address string for comparison purposes."""
 
-    return address.replace("-", "").replace("_", "").replace(":", "").lower()
+    return address.translate(_BLE_ADDRESS_SEPARATORS).lower()
 
 
-def _generate_state_updates(
-    logger: logging.Logger,
-    *,
-    rng_seed: Optional[int] = None,
-) -> Iterator[Tuple[StateUpdate, int, int, bool]]:
-    """Yield protobuf state updates derived from the simulation environment."""
+class _Transition(NamedTuple):
+    """One simulated step, kept as plain integers until it is serialised."""
+
+    packed_transition: int
+    prior_state_id: int
+    next_state_id: int
+    action_value: int
+    reward: int
+    done: bool
 
-    if GridWorldEnvironment is None or MeshtasticNode is None:
-        raise RuntimeError("Simulation environment is unavailable")
 
-    rng = random.Random(rng_seed)
-    environment, node = _create_environment(logger)
-    prior_state = environment.encode_state(node.location)
+class _TransitionStream:
+    """Endless iterator of transitions produced by the simulated mesh node."""
 
-    while True:
-        surroundings = environment.surroundings_for(node.location)
-        available_actions = surroundings.available_actions()
-        selectable_actions = [
-            action for action in available_actions if action != int(Action.STOP)
-        ]
-        if not selectable_actions:
-            selectable_actions = available_actions
+    def __init__(self, logger: logging.Logger, *, rng_seed: Optional[int] = None) -> None:
+        if GridWorldEnvironment is None or MeshtasticNode is None:
+            raise RuntimeError("Simulation environment is unavailable")
+
+        self._logger = logger
+        self._rng = random.Random(rng_seed)
+        self._environment, self._node = _create_environment(logger)
+        self._prior_state = self._environment.encode_state(self._node.location)
+
+    def __iter__(self) -> _TransitionStream:
+        return self
+
+    def __next__(self) -> _Transition:
+        logger = self._logger
+        environment = self._environment
+        while True:
+            node = self._node
+            # The environment caches each tile's mask; prefer anything but
+            # STOP so the walk keeps exploring.
+            action_mask = environment.surroundings_for(node.location).action_mask()
+            selectable_actions = _ACTIONS_BY_MASK[action_mask & ~_STOP_ACTION_BIT or action_mask]
+            if selectable_actions:
+                break
 
-        if not selectable_actions:
             logger.warning(
                 "No available actions for node %s; resetting simulation environment",
                 node.identifier,
             )
-            environment, node = _create_environment(logger)
-            prior_state = environment.encode_state(node.location)
-            continue
-
-        action_value = rng.choice(selectable_actions)
-        next_state_id, updated_node, reward, done = environment.step(
-            node, action_value
-        )
-        packed_transition = _pack_transition(
-            updated_node.location, action_value, reward, done
-        )
-        state_update = StateUpdate(
-            packed_transition=packed_transition,
-            prior_state_id=prior_state,
-            next_state_id=next_state_id,
-        )
-        action_name = _resolve_action_name(action_value)
-        logger.debug(
-            "Simulated transition: prior=%s next=%s action=%s reward=%s done=%s",
+            self._reset()
+
+        prior_state = self._prior_state
+        action_value = self._rng.choice(selectable_actions)
+        next_state_id, updated_node, reward, done = environment.step(node, action_value)
+        location = updated_node.location
+        transition = _Transition(
+            _pack_transition_fields(location.x, location.y, action_value, reward, done),
             prior_state,
             next_state_id,
-            action_name,
+            action_value,
             reward,
             done,
         )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Simulated transition: prior=%s next=%s action=%s reward=%s done=%s",
+                prior_state,
+                next_state_id,
+                _resolve_action_name(action_value),
+                reward,
+                done,
+            )
 
-        yield state_update, action_value, reward, done
-
-        node = updated_node
-        prior_state = next_state_id
-
+        self._node = updated_node
+        self._prior_state = next_state_id
         if done:
             logger.info(
                 "Simulation reached terminal condition; reinitialising environment."
             )
-            environment, node = _create_environment(logger)
-            prior_state = environment.encode_state(node.location)
+            self._reset()
+        return transition
+
+    def _reset(self) -> None:
+        self._environment, self._node = _reset_environment(self._environment)
+        self._prior_state = self._environment.encode_state(self._node.location)
 
 
 def _create_environment(logger: logging.Logger) -> Tuple[GridWorldEnvironment, MeshtasticNode]:
@@ -520,93 +818,113 @@ def _create_environment(logger: logging.Logger) -> Tuple[GridWorldEnvironment, M
     if GridWorldEnvironment is None or MeshtasticNode is None:
         raise RuntimeError("Simulation environment is unavailable")
 
-    rewards = {
-        (3, 3): 8,
-        (8, 8): 5,
-        (5, 7): -3,
-    }
     environment = GridWorldEnvironment(
         12,
         12,
-        rewards=rewards,
+        rewards=_SIMULATION_REWARDS,
         log_callback=logger.debug,
     )
-    node = MeshtasticNode(
+    return environment, _create_simulated_node()
+
+
+def _reset_environment(
+    environment: GridWorldEnvironment,
+) -> Tuple[GridWorldEnvironment, MeshtasticNode]:
+    """Reset ``environment`` in place for a new episode with a freshly placed node."""
+
+    environment.reset()
+    return environment, _create_simulated_node()
+
+
+def _create_simulated_node() -> MeshtasticNode:
+    """Return the simulated mesh node at its starting position."""
+
+    return MeshtasticNode(
         identifier="sim-node-1",
         battery_level=96.0,
         compute_efficiency_flops_per_milliamp=12_500.0,
         location=GridLocation(6, 6),
     )
-    return environment, node
-
-
-def _pack_transition(
-    location: GridLocation,
-    action_value: int,
-    reward: int,
-    done: bool,
-) -> int:
-    """Pack the transition details into the fixed width protobuf field."""
-
-    x = max(0, min(1023, int(location.x)))
-    y = max(0, min(1023, int(location.y)))
-    action_bits = int(action_value) & 0b111
-    done_bit = 1 if done else 0
-    reward_clamped = max(-128, min(127, int(reward)))
-    reward_bits = reward_clamped & 0xFF
+
+
+@lru_cache(maxsize=4096)
+def _pack_transition_fields(x: int, y: int, action_value: int, reward: int, done: bool) -> int:
+    """Pack the transition details into the fixed width protobuf field.
+
+    The clamps are written as conditional expressions rather than nested
+    ``min``/``max`` calls so the common in-range case costs two comparisons
+    per field and no function calls. A random walk on a small grid revisits
+    the same few hundred transitions, so results are memoised as well.
+    """
+
+    x = 0 if x < 0 else 1023 if x > 1023 else x
+    y = 0 if y < 0 else 1023 if y > 1023 else y
+    reward = -128 if reward < -128 else 127 if reward > 127 else reward
     return (
         x
         | (y << 10)
-        | (action_bits << 20)
-        | (done_bit << 23)
-        | (reward_bits << 24)
+        | ((action_value & 0b111) << 20)
+        | ((1 if done else 0) << 23)
+        | ((reward & 0xFF) << 24)
     )
 
 
-def _calculate_mesh_energy(
-    bytes_sent: int,
+def _make_mesh_energy_estimator(
     device_count: int,
     *,
-    data_rate_bps: float = 9600.0,
-    tx_current_ma: float = 120.0,
-    rx_current_ma: float = 45.0,
-) -> dict[str, float]:
-    """Estimate amp-hour usage for transmitting payloads across the mesh."""
+    data_rate_bps: float = MESH_DATA_RATE_BPS,
+    tx_current_ma: float = MESH_TX_CURRENT_MA,
+    rx_current_ma: float = MESH_RX_CURRENT_MA,
+) -> Callable[[int], EnergyStats]:
+    """Return a per-payload energy estimator for a fixed mesh and radio profile.
+
+    The mesh size and radio parameters do not change while streaming, so the
+    validation and unit conversions are done once here and each estimate only
+    scales the airtime of the payload.
+    """
 
     if device_count < 1:
         raise ValueError("device_count must be a positive integer")
     if data_rate_bps <= 0:
         raise ValueError("data_rate_bps must be positive")
 
-    bits_sent = bytes_sent * 8
-    tx_time_seconds = bits_sent / data_rate_bps
-    rx_time_seconds = tx_time_seconds * max(device_count - 1, 0)
-    tx_amp_hours = (tx_current_ma / 1000.0) * (tx_time_seconds / 3600.0)
-    rx_amp_hours = (rx_current_ma / 1000.0) * (rx_time_seconds / 3600.0)
-    total_amp_hours = tx_amp_hours + rx_amp_hours
-    return {
-        "bits_sent": float(bits_sent),
-        "tx_time_seconds": float(tx_time_seconds),
-        "rx_time_seconds": float(rx_time_seconds),
-        "tx_amp_hours": float(tx_amp_hours),
-        "rx_amp_hours": float(rx_amp_hours),
-        "total_amp_hours": float(total_amp_hours),
-    }
+    receiver_count = max(device_count - 1, 0)
+    seconds_per_bit = 1.0 / data_rate_bps
+    tx_amp_hours_per_second = tx_current_ma * _MILLIAMPS_TO_AMP_HOURS_PER_SECOND
+    rx_amp_hours_per_second = (
+        rx_current_ma * _MILLIAMPS_TO_AMP_HOURS_PER_SECOND * receiver_count
+    )
+
+    def estimate(bytes_sent: int) -> EnergyStats:
+        bits_sent = bytes_sent * 8
+        tx_time_seconds = bits_sent * seconds_per_bit
+        tx_amp_hours = tx_time_seconds * tx_amp_hours_per_second
+        rx_amp_hours = tx_time_seconds * rx_amp_hours_per_second
+        return EnergyStats(
+            float(bits_sent),
+            tx_time_seconds,
+            tx_time_seconds * receiver_count,
+            tx_amp_hours,
+            rx_amp_hours,
+            tx_amp_hours + rx_amp_hours,
+        )
+
+    return estimate
 
 
 def _resolve_action_name(action_value: int) -> str:
     """Return a human readable action name for logging purposes."""
 
-    if Action is None:
-        return str(action_value)
-    member = Action._value2member_map_.get(int(action_value))  # type: ignore[attr-defined]
-    return member.name if member is not None else str(action_value)
+    if _ACTION_NAMES is not None and 0 <= action_value < len(_ACTION_NAMES):
+        return _ACTION_NAMES[action_value]
+    return str(action_value)
 
 
 def main() -> None:
     """Run the Meshtastic BLE connector utility."""
     args = parse_arguments()
     logger = configure_logging(args.log_level)
+    logger.debug("Using the %s protobuf implementation.", api_implementation.Type())
 
     should_list = args.node_id is None or args.list_nodes
     if should_list:
@@ -615,7 +933,12 @@ def main() -> None:
     firmware_path = args.firmware_path.expanduser() if args.firmware_path else None
 
     if args.node_id:
-        inspect_device(logger, args.node_id, firmware_path=firmware_path)
+        inspect_device(
+            logger,
+            args.node_id,
+            firmware_path=firmware_path,
+            simulate=args.simulation,
+        )
 
 
 if __name__ == "__main__":
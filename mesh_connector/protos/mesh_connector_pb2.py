@@ -1,131 +1,28 @@
-"""Lightweight runtime protobuf bindings for the Compotastic mesh connector."""
-
-from __future__ import annotations
-
-from google.protobuf import descriptor_pb2 as _descriptor_pb2
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: mesh_connector.proto
+"""Generated protocol buffer code."""
+from google.protobuf.internal import builder as _builder
+from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
 from google.protobuf import symbol_database as _symbol_database
+# @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
 
-_FILE_NAME = "mesh_connector.proto"
-
-
-def _build_file_descriptor() -> None:
-    """Register the mesh connector proto definitions with the descriptor pool."""
-
-    pool = _descriptor_pool.Default()
-    try:
-        pool.FindFileByName(_FILE_NAME)
-        return
-    except KeyError:
-        pass
-
-    file_proto = _descriptor_pb2.FileDescriptorProto()
-    file_proto.name = _FILE_NAME
-    file_proto.package = "compotastic.mesh"
-    file_proto.syntax = "proto3"
-    file_proto.dependency.append("meshtastic/mesh.proto")
-
-    state_update = file_proto.message_type.add()
-    state_update.name = "StateUpdate"
-
-    field = state_update.field.add()
-    field.name = "packed_transition"
-    field.number = 1
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_FIXED32
-
-    field = state_update.field.add()
-    field.name = "prior_state_id"
-    field.number = 2
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    field = state_update.field.add()
-    field.name = "next_state_id"
-    field.number = 3
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    addressable = file_proto.message_type.add()
-    addressable.name = "AddressableMeshData"
-
-    field = addressable.field.add()
-    field.name = "protocol_version"
-    field.number = 1
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    field = addressable.field.add()
-    field.name = "application_id"
-    field.number = 2
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    field = addressable.field.add()
-    field.name = "source_address"
-    field.number = 3
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    field = addressable.field.add()
-    field.name = "destination_address"
-    field.number = 4
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    field = addressable.field.add()
-    field.name = "sequence_id"
-    field.number = 5
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_UINT32
-
-    payload_oneof = addressable.oneof_decl.add()
-    payload_oneof.name = "payload"
-
-    field = addressable.field.add()
-    field.name = "state_update"
-    field.number = 16
-    field.label = _descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
-    field.type = _descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
-    field.type_name = ".compotastic.mesh.StateUpdate"
-    field.oneof_index = 0
-
-    pool.Add(file_proto)
-
-
-_build_file_descriptor()
-
-DESCRIPTOR = _descriptor_pool.Default().FindFileByName(_FILE_NAME)
-
-STATEUPDATE = DESCRIPTOR.message_types_by_name["StateUpdate"]
-ADDRESSABLEMESHDATA = DESCRIPTOR.message_types_by_name["AddressableMeshData"]
-
-
-StateUpdate = _reflection.GeneratedProtocolMessageType(
-    "StateUpdate",
-    (_message.Message,),
-    {
-        "DESCRIPTOR": STATEUPDATE,
-        "__module__": __name__,
-    },
-)
-_sym_db.RegisterMessage(StateUpdate)
 
 
-AddressableMeshData = _reflection.GeneratedProtocolMessageType(
-    "AddressableMeshData",
-    (_message.Message,),
-    {
-        "DESCRIPTOR": ADDRESSABLEMESHDATA,
-        "__module__": __name__,
-    },
-)
-_sym_db.RegisterMessage(AddressableMeshData)
 
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x14mesh_connector.proto\x12\x10\x63ompotastic.mesh\"\xd3\x01\n\x13\x41\x64\x64ressableMeshData\x12\x18\n\x10protocol_version\x18\x01 \x01(\r\x12\x16\n\x0e\x61pplication_id\x18\x02 \x01(\r\x12\x16\n\x0esource_address\x18\x03 \x01(\r\x12\x1b\n\x13\x64\x65stination_address\x18\x04 \x01(\r\x12\x13\n\x0bsequence_id\x18\x05 \x01(\r\x12\x35\n\x0cstate_update\x18\x10 \x01(\x0b\x32\x1d.compotastic.mesh.StateUpdateH\x00\x42\t\n\x07payload\"W\n\x0bStateUpdate\x12\x19\n\x11packed_transition\x18\x01 \x01(\x07\x12\x16\n\x0eprior_state_id\x18\x02 \x01(\r\x12\x15\n\rnext_state_id\x18\x03 \x01(\rBZ\n\x13\x61i.compotastic.meshP\x01Z\"github.com/compotastic/protos/mesh\xa2\x02\x03\x43MX\xaa\x02\x10\x43ompotastic.Mesh\xba\x02\x03\x43MXb\x06proto3')
 
-__all__ = ["AddressableMeshData", "StateUpdate"]
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, globals())
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'mesh_connector_pb2', globals())
+if _descriptor._USE_C_DESCRIPTORS == False:
 
+  DESCRIPTOR._options = None
+  DESCRIPTOR._serialized_options = b'\n\023ai.compotastic.meshP\001Z\"github.com/compotastic/protos/mesh\242\002\003CMX\252\002\020Compotastic.Mesh\272\002\003CMX'
+  _ADDRESSABLEMESHDATA._serialized_start=43
+  _ADDRESSABLEMESHDATA._serialized_end=254
+  _STATEUPDATE._serialized_start=256
+  _STATEUPDATE._serialized_end=343
+# @@protoc_insertion_point(module_scope)
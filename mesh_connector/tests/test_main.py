@@ -0,0 +1,431 @@
+"""Tests for the Meshtastic BLE utility helpers."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+import pytest
+from meshtastic.protobuf import mesh_pb2
+
+from backend.simulation.logic import Surroundings
+
+from mesh_connector import main
+
+FIRMWARE = bytes(range(10))
+CHUNK_SIZE = 4
+ACK_TIMEOUT_SECONDS = 0.2
+SETTLE_SECONDS = 0.1
+
+# (delay in seconds, genuine) pairs describing the notifications the fake loader
+# sends after a write. Genuine notifications acknowledge that write; the others
+# are duplicates or strays.
+Responses = Callable[[int], Iterable[Tuple[float, bool]]]
+
+
+def _acknowledge_each_write(_index: int) -> Iterable[Tuple[float, bool]]:
+    return [(0.0, True)]
+
+
+class _FakeOTALoader:
+    """Stand-in for ``BleakClient`` that notifies according to ``responses``."""
+
+    def __init__(self, responses: Responses = _acknowledge_each_write) -> None:
+        self.responses = responses
+        self.writes: List[bytes] = []
+        self.acknowledged = 0
+        # Writes still awaiting a genuine acknowledgement, sampled at each write.
+        self.unacknowledged: List[int] = []
+        # Simulate the loader rebooting this long after the last chunk arrives.
+        self.reboot_delay: float | None = None
+        self.disconnected = False
+        self.disconnected_before_exit = False
+        self._handler: Callable[[int, bytes], None] | None = None
+        self._disconnected_callback: Callable[[object], None] | None = None
+
+    def __call__(
+        self,
+        _address: str,
+        *,
+        disconnected_callback: Callable[[object], None] | None = None,
+    ) -> _FakeOTALoader:
+        self._disconnected_callback = disconnected_callback
+        return self
+
+    @property
+    def max_unacknowledged(self) -> int:
+        return max(self.unacknowledged, default=0)
+
+    async def __aenter__(self) -> _FakeOTALoader:
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        self.disconnected_before_exit = self.disconnected
+
+    async def get_services(self) -> List[SimpleNamespace]:
+        characteristic = SimpleNamespace(uuid=main.OTA_DATA_CHARACTERISTIC_UUID)
+        return [SimpleNamespace(characteristics=[characteristic])]
+
+    async def start_notify(self, _uuid: str, handler: Callable[[int, bytes], None]) -> None:
+        self._handler = handler
+
+    async def write_gatt_char(self, _uuid: str, data: bytes, response: bool) -> None:  # noqa: ARG002
+        index = len(self.writes)
+        self.writes.append(bytes(data))
+        self.unacknowledged.append(index - self.acknowledged)
+        loop = asyncio.get_running_loop()
+        for delay, genuine in self.responses(index):
+            loop.call_later(delay, self._notify, index, genuine)
+        if self.reboot_delay is not None and index == len(_chunks(FIRMWARE)):
+            loop.call_later(self.reboot_delay, self._disconnect)
+
+    def _notify(self, index: int, genuine: bool) -> None:
+        if genuine:
+            self.acknowledged = max(self.acknowledged, index + 1)
+        assert self._handler is not None
+        self._handler(0, bytes([index]))
+
+    def _disconnect(self) -> None:
+        self.disconnected = True
+        if self._disconnected_callback is not None:
+            self._disconnected_callback(self)
+
+
+@pytest.fixture
+def loader(monkeypatch: pytest.MonkeyPatch) -> _FakeOTALoader:
+    fake = _FakeOTALoader()
+    monkeypatch.setattr(main, "BleakClient", fake)
+    monkeypatch.setattr(main, "OTA_CHUNK_SIZE", CHUNK_SIZE)
+    monkeypatch.setattr(main, "OTA_ACK_TIMEOUT_SECONDS", ACK_TIMEOUT_SECONDS)
+    monkeypatch.setattr(main, "OTA_SIZE_SETTLE_SECONDS", SETTLE_SECONDS)
+    monkeypatch.setattr(main, "OTA_FINALISE_SECONDS", ACK_TIMEOUT_SECONDS)
+    return fake
+
+
+def _chunks(data: bytes) -> List[bytes]:
+    return [data[start : start + CHUNK_SIZE] for start in range(0, len(data), CHUNK_SIZE)]
+
+
+def test_transfer_waits_for_each_acknowledgement(loader: _FakeOTALoader) -> None:
+    main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.writes == [f"OTA_SIZE:{len(FIRMWARE)}".encode("ascii"), *_chunks(FIRMWARE)]
+    assert loader.max_unacknowledged == 0
+
+
+def test_duplicate_acknowledgement_does_not_release_next_chunk(loader: _FakeOTALoader) -> None:
+    loader.responses = lambda _index: [(0.0, True), (0.0, False)]
+
+    main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.writes[1:] == _chunks(FIRMWARE)
+    assert loader.max_unacknowledged == 0
+
+
+def test_late_header_acknowledgement_is_not_credited_to_first_chunk(
+    loader: _FakeOTALoader,
+) -> None:
+    # The header ACK lands after the settle bound, while chunk 1 is outstanding.
+    loader.responses = lambda index: [(SETTLE_SECONDS * 1.5 if index == 0 else SETTLE_SECONDS, True)]
+
+    main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.writes[1:] == _chunks(FIRMWARE)
+    # Only the header is outstanding when chunk 1 goes out; every later chunk
+    # waits for its predecessor's own acknowledgement.
+    assert loader.unacknowledged == [0, 1, 0, 0]
+
+
+def test_unacknowledged_header_does_not_stall_transfer(
+    loader: _FakeOTALoader,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    loader.responses = lambda index: [] if index == 0 else [(0.0, True)]
+
+    with caplog.at_level(logging.WARNING, logger="test.ota"):
+        main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.writes[1:] == _chunks(FIRMWARE)
+    assert not caplog.records
+
+
+def test_finalise_waits_for_reboot_rather_than_stray_notifications(
+    loader: _FakeOTALoader,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(main, "OTA_FINALISE_SECONDS", 5.0)
+    loader.responses = lambda _index: [(0.0, True), (0.01, False)]
+    loader.reboot_delay = 0.05
+
+    main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.disconnected_before_exit
+
+
+def test_missing_acknowledgement_warns_and_continues(
+    loader: _FakeOTALoader,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    loader.responses = lambda index: [] if index == 2 else [(0.0, True)]
+
+    with caplog.at_level(logging.WARNING, logger="test.ota"):
+        main._transfer_firmware("AA:BB", FIRMWARE, logging.getLogger("test.ota"))
+
+    assert loader.writes[1:] == _chunks(FIRMWARE)
+    assert [record.getMessage() for record in caplog.records] == [
+        "Did not receive OTA acknowledgement after chunk 2; continuing."
+    ]
+
+
+def test_stream_surfaces_simulation_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    def _failing_transitions(_logger: logging.Logger) -> Iterator[main._Transition]:
+        yield main._Transition(0, 1, 2, 0, 0, False)
+        raise RuntimeError("simulation failed")
+
+    monkeypatch.setattr(main, "_TransitionStream", _failing_transitions)
+    sent: List[bytes] = []
+    interface = SimpleNamespace(sendData=sent.append)
+
+    async def _stream() -> None:
+        await asyncio.wait_for(
+            main.stream_state_updates_async(
+                interface,
+                logging.getLogger("test.stream"),
+                interval_seconds=0,
+                max_updates=None,
+            ),
+            timeout=5,
+        )
+
+    with pytest.raises(RuntimeError, match="simulation failed"):
+        asyncio.run(_stream())
+    assert len(sent) == 1
+
+
+def test_mapped_transfer_propagates_write_errors(
+    loader: _FakeOTALoader,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    write_gatt_char = loader.write_gatt_char
+
+    async def _fail_on_third_write(uuid: str, data: bytes, response: bool) -> None:
+        if len(loader.writes) == 2:
+            raise OSError("link lost")
+        await write_gatt_char(uuid, data, response)
+
+    monkeypatch.setattr(loader, "write_gatt_char", _fail_on_third_write)
+    firmware_path = tmp_path / "firmware.bin"
+    firmware_path.write_bytes(FIRMWARE)
+
+    with pytest.raises(OSError, match="link lost"):
+        with main._map_firmware(firmware_path) as firmware:
+            main._transfer_firmware("AA:BB", firmware, logging.getLogger("test.ota"))
+
+
+def test_mesh_energy_estimate_scales_with_payload_and_receivers() -> None:
+    estimate = main._make_mesh_energy_estimator(
+        3, data_rate_bps=1000.0, tx_current_ma=100.0, rx_current_ma=10.0
+    )
+
+    stats = estimate(125)
+
+    assert stats == pytest.approx(
+        main.EnergyStats(
+            bits_sent=1000.0,
+            tx_time_seconds=1.0,
+            rx_time_seconds=2.0,
+            tx_amp_hours=0.1 / 3600.0,
+            rx_amp_hours=0.02 / 3600.0,
+            total_amp_hours=0.12 / 3600.0,
+        )
+    )
+    assert estimate(250).total_amp_hours == pytest.approx(2 * stats.total_amp_hours)
+
+
+@pytest.mark.parametrize("device_count, data_rate_bps", [(0, 1000.0), (2, 0.0)])
+def test_mesh_energy_estimator_rejects_invalid_profiles(
+    device_count: int, data_rate_bps: float
+) -> None:
+    with pytest.raises(ValueError):
+        main._make_mesh_energy_estimator(device_count, data_rate_bps=data_rate_bps)
+
+
+def test_pack_transition_fields_layout_and_clamping() -> None:
+    packed = main._pack_transition_fields(3, 5, 2, -1, True)
+
+    assert packed & 0x3FF == 3
+    assert (packed >> 10) & 0x3FF == 5
+    assert (packed >> 20) & 0b111 == 2
+    assert (packed >> 23) & 1 == 1
+    assert (packed >> 24) & 0xFF == 0xFF
+    assert main._pack_transition_fields(-4, 2000, 0, 500, False) == (1023 << 10) | (127 << 24)
+
+
+def test_transition_stream_explores_without_stopping() -> None:
+    stream = main._TransitionStream(logging.getLogger("test.stream"), rng_seed=0)
+
+    actions = {transition.action_value for transition in itertools.islice(stream, 200)}
+
+    assert actions
+    assert int(main.Action.STOP) not in actions
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["AA:BB:CC:DD:EE:FF", "aa-bb-cc-dd-ee-ff", "AA_BB_CC_DD_EE_FF", "aabbccddeeff"],
+)
+def test_normalize_ble_address_ignores_separators_and_case(address: str) -> None:
+    assert main._normalize_ble_address(address) == "aabbccddeeff"
+
+
+def test_message_log_fields_render_readable_values() -> None:
+    user = mesh_pb2.User(
+        long_name="Cat",
+        macaddr=b"\x01\xab",
+        hw_model=mesh_pb2.HardwareModel.TBEAM,
+    )
+
+    assert main._message_log_fields(user) == [
+        ("hw_model", "TBEAM"),
+        ("long_name", "Cat"),
+        ("macaddr", "01ab"),
+    ]
+    node = mesh_pb2.NodeInfo(num=5, user=mesh_pb2.User(long_name="Cat"))
+    assert main._message_log_fields(node) == [("num", 5), ("user", 'long_name: "Cat"')]
+    route = mesh_pb2.RouteDiscovery(route=[1, 2])
+    assert main._message_log_fields(route) == [("route", [1, 2])]
+
+
+@pytest.mark.parametrize(
+    "flags, expected",
+    [([], True), (["--simulation"], True), (["--no-simulation"], False)],
+)
+def test_simulation_flag_defaults_on(
+    monkeypatch: pytest.MonkeyPatch, flags: List[str], expected: bool
+) -> None:
+    monkeypatch.setattr("sys.argv", ["main.py", "--node-id", "cat", *flags])
+
+    assert main.parse_arguments().simulation is expected
+
+
+@pytest.mark.parametrize("simulate", [True, False])
+def test_inspect_device_streams_only_when_simulating(
+    monkeypatch: pytest.MonkeyPatch, simulate: bool
+) -> None:
+    closed: List[bool] = []
+    interface = SimpleNamespace(
+        myInfo=None,
+        metadata=None,
+        localNode=SimpleNamespace(getMetadata=lambda: None),
+        close=lambda: closed.append(True),
+    )
+    streamed: List[object] = []
+    monkeypatch.setattr(main, "BLEInterface", lambda _node_identifier: interface)
+    monkeypatch.setattr(
+        main, "stream_state_updates", lambda iface, _logger: streamed.append(iface)
+    )
+
+    main.inspect_device(logging.getLogger("test.inspect"), "cat", simulate=simulate)
+
+    assert streamed == ([interface] if simulate else [])
+    assert closed == [True]
+
+
+def test_actions_by_mask_matches_surroundings() -> None:
+    for mask, actions in enumerate(main._ACTIONS_BY_MASK):
+        expected = Surroundings.from_mask(mask).available_actions()
+        assert list(actions) == [int(action) for action in expected]
+
+
+class _FakeScanner:
+    """Stand-in for ``BleakScanner`` that replays ``(delay, address)`` adverts."""
+
+    def __init__(self, adverts: List[Tuple[float, str]]) -> None:
+        self.adverts = adverts
+
+    def __call__(
+        self, *, detection_callback: Callable[[object, object], None], **_kwargs: object
+    ) -> _FakeScanner:
+        self._callback = detection_callback
+        return self
+
+    async def __aenter__(self) -> _FakeScanner:
+        loop = asyncio.get_running_loop()
+        self._handles = [
+            loop.call_later(delay, self._callback, SimpleNamespace(address=address), None)
+            for delay, address in self.adverts
+        ]
+        return self
+
+    async def __aexit__(self, *_exc_info: object) -> None:
+        for handle in self._handles:
+            handle.cancel()
+
+
+def _discover(
+    monkeypatch: pytest.MonkeyPatch, adverts: List[Tuple[float, str]]
+) -> Tuple[object, float]:
+    monkeypatch.setattr(main, "BleakScanner", _FakeScanner(adverts))
+    monkeypatch.setattr(main, "OTA_SCAN_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(main, "OTA_DISCOVERY_WINDOW_SECONDS", 0.2)
+
+    async def _timed() -> Tuple[object, float]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        device = await main._discover_ota_peripheral("AA:BB", logging.getLogger("test.scan"))
+        return device, loop.time() - started
+
+    return asyncio.run(_timed())
+
+
+def test_discovery_prefers_original_device_within_window(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    device, elapsed = _discover(monkeypatch, [(0.0, "CC:DD"), (0.05, "aa-bb")])
+
+    assert device.address == "aa-bb"
+    assert elapsed < 0.2
+
+
+def test_discovery_falls_back_after_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    device, elapsed = _discover(monkeypatch, [(0.0, "CC:DD"), (0.05, "EE:FF")])
+
+    assert device.address == "CC:DD"
+    assert 0.2 <= elapsed < 1.0
+
+
+def test_discovery_gives_up_at_scan_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(main, "OTA_SCAN_TIMEOUT_SECONDS", 0.1)
+    monkeypatch.setattr(main, "BleakScanner", _FakeScanner([]))
+
+    device = asyncio.run(main._discover_ota_peripheral("AA:BB", logging.getLogger("test.scan")))
+
+    assert device is None
+
+
+def test_stream_paces_sends_against_a_fixed_schedule() -> None:
+    interval = 0.1
+    send_times: List[float] = []
+
+    def _slow_send(_payload: bytes) -> None:
+        send_times.append(time.monotonic())
+        time.sleep(interval * 0.6)
+
+    asyncio.run(
+        main.stream_state_updates_async(
+            SimpleNamespace(sendData=_slow_send),
+            logging.getLogger("test.stream"),
+            interval_seconds=interval,
+            max_updates=5,
+        )
+    )
+
+    # Send latency is absorbed into the interval instead of being added to it.
+    assert len(send_times) == 5
+    assert 4 * interval * 0.9 <= send_times[-1] - send_times[0] < 4 * interval * 1.4